@@ -0,0 +1,101 @@
+"""Compare the single-pass dbSNP parser against the XPath-based reference on recorded fixtures.
+
+Run from the repository root with::
+
+    python -m benchmarks.bench_parsing
+
+or, with the package installed (``pip install -e .``), as ``python benchmarks/bench_parsing.py``.
+"""
+import re
+from pathlib import Path
+from timeit import repeat
+from xml.etree.ElementTree import fromstring, tostring
+
+from pandas import DataFrame
+from pandas.testing import assert_frame_equal
+
+from easy_entrez.parsing import namespaces, parse_docsum, _parse_dbsnp_xml
+
+#: The responses recorded from the E-utilities, shared with the tests.
+DATA = Path(__file__).parent.parent / 'tests' / 'data'
+
+
+def reference_parse(snps):
+    """The previous implementation, scanning the subtree of each variant with XPath for every field."""
+    results = []
+    alt_frequencies = []
+    preferred_id = {}
+    summaries = []
+    for snp in snps:
+        rs_id = snp.attrib['uid']
+        spdi = snp.find('.//ns0:SPDI', namespaces).text.split(',')
+        chrom, pos = snp.find('.//ns0:CHRPOS', namespaces).text.split(':')
+        chrom_prev, pos_prev = snp.find('.//ns0:CHRPOS_PREV_ASSM', namespaces).text.split(':')
+        sig_class = snp.find('.//ns0:FXN_CLASS', namespaces).text
+        doc_sum = parse_docsum(snp.find('.//ns0:DOCSUM', namespaces).text)
+        summaries.append({**doc_sum, 'rs_id': f'rs{rs_id}'})
+        merged_into = snp.find('.//ns0:SNP_ID', namespaces).text
+        if rs_id != merged_into:
+            assert snp.find('.//ns0:MERGED_SORT', namespaces).text == '1'
+        preferred_id[f'rs{rs_id}'] = f'rs{merged_into}'
+        expected_ref = {s.split(':')[-2] for s in spdi}
+        expected_alt = [s.split(':')[-1] for s in spdi]
+        for maf in snp.findall('.//ns0:GLOBAL_MAFS/ns0:MAF', namespaces):
+            study = maf.findall('.//ns0:STUDY', namespaces)[0].text
+            for frequency in maf.findall('.//ns0:FREQ', namespaces):
+                match = re.match(
+                    r'(?P<alt>(?:A|C|T|G|-)+)=(?P<frequency>\d+.\d*)/(?P<count>\d+)',
+                    frequency.text
+                ).groupdict()
+                freq = float(match['frequency'])
+                alt_frequencies.append({
+                    'rs_id': f'rs{rs_id}',
+                    'allele': match['alt'],
+                    'source_frequency': freq,
+                    'total_count': int(match['count']),
+                    'study': study,
+                    'count': freq * int(match['count']),
+                })
+        results.append({
+            'rs_id': f'rs{rs_id}',
+            'ref': list(expected_ref)[0],
+            'alts': ','.join(expected_alt),
+            'chrom': chrom,
+            'pos': int(pos),
+            'chrom_prev': chrom_prev,
+            'pos_prev': int(pos_prev),
+            'consequence': sig_class
+        })
+    return DataFrame(results).set_index('rs_id'), DataFrame(alt_frequencies), DataFrame(summaries).set_index('rs_id')
+
+
+def recorded_fixture(copies: int):
+    """Concatenate the recorded DocumentSummary elements `copies` times."""
+    root = fromstring((DATA / 'two_snps.xml').read_bytes())
+    variants = list(root) + list(fromstring((DATA / 'snp_merged_into_another.xml').read_bytes()))
+    root[:] = variants * copies
+    # re-parse to obtain independent elements, as a real response would
+    return fromstring(tostring(root))
+
+
+def main(copies=300, number=3):
+    snps = recorded_fixture(copies)
+    ids = [f'rs{snp.attrib["uid"]}' for snp in snps]
+
+    coordinates, alt_frequencies, summary = reference_parse(snps)
+    variant_set = _parse_dbsnp_xml(snps, ids=ids)
+    assert_frame_equal(variant_set.coordinates, coordinates, check_dtype=False, check_categorical=False)
+    assert_frame_equal(variant_set.alt_frequencies, alt_frequencies, check_dtype=False, check_categorical=False)
+    assert_frame_equal(variant_set.summary, summary, check_dtype=False)
+
+    reference = min(repeat(lambda: reference_parse(snps), number=number, repeat=3)) / number
+    single_pass = min(repeat(lambda: _parse_dbsnp_xml(snps, ids=ids), number=number, repeat=3)) / number
+    print(f'{len(snps)} variants')
+    print(f'reference (XPath scans): {reference * 1000:.1f} ms')
+    print(f'single pass:             {single_pass * 1000:.1f} ms')
+    print(f'speedup:                 {reference / single_pass:.2f}x')
+    return reference / single_pass
+
+
+if __name__ == '__main__':
+    main()
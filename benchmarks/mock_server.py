@@ -0,0 +1,166 @@
+"""A local stand-in for the E-utilities server replaying recorded payloads.
+
+The server answers ``esearch``, ``esummary``, ``efetch`` (dbSNP DocumentSummary records, one per
+requested identifier) and ``elink`` with payloads derived from the recorded responses (``tests/data``),
+and can simulate latency, server errors and throttling (429 with ``Retry-After``).
+
+    >>> with MockEutils(latency=0.02, error_rate=0.05, rate_limit=10) as server:
+    ...     entrez_api = EntrezAPI('benchmark', 'e@mail.com', server=server.url)
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from random import Random
+from threading import Lock, Thread
+from time import monotonic, sleep
+from typing import Dict, List, Optional
+from xml.etree.ElementTree import fromstring, tostring
+
+from tests.eutils_server import EutilsHandler
+
+#: The responses recorded from the E-utilities, shared with the tests.
+DATA = Path(__file__).parent.parent / 'tests' / 'data'
+
+
+def _record_template() -> str:
+    root = fromstring((DATA / 'two_snps.xml').read_bytes())
+    return tostring(root[0]).decode()
+
+
+_RECORD = _record_template()
+_ID_PATTERN = re.compile(r'uid="6311"|<ns0:SNP_ID>6311</ns0:SNP_ID>')
+_EXCHANGE_SET_START = '<ns0:ExchangeSet xmlns:ns0="https://www.ncbi.nlm.nih.gov/SNP/docsum">'
+
+
+def efetch_payload(ids: List[str]) -> bytes:
+    """dbSNP records for the identifiers, as returned by EFetch."""
+    records = [
+        _ID_PATTERN.sub(lambda match: match.group().replace('6311', uid), _RECORD)
+        for uid in ids
+    ]
+    return (_EXCHANGE_SET_START + ''.join(records) + '</ns0:ExchangeSet>').encode()
+
+
+def esummary_payload(ids: List[str]) -> bytes:
+    return json.dumps({
+        'header': {'type': 'esummary', 'version': '0.3'},
+        'result': {
+            'uids': ids,
+            **{uid: {'uid': uid, 'title': f'Article {uid}', 'pubdate': '2020'} for uid in ids}
+        }
+    }).encode()
+
+
+def esearch_payload(params: Dict[str, str], count: int) -> bytes:
+    start = int(params.get('retstart', 0))
+    size = int(params.get('retmax', 20))
+    ids = [str(i) for i in range(start + 1, min(count, start + size) + 1)]
+    return json.dumps({
+        'esearchresult': {'count': str(count), 'retmax': str(len(ids)), 'retstart': str(start), 'idlist': ids}
+    }).encode()
+
+
+def elink_payload(ids: List[str]) -> bytes:
+    return json.dumps({
+        'linksets': [
+            {'dbfrom': 'snp', 'ids': [uid], 'linksetdbs': [{'dbto': 'gene', 'linkname': 'snp_gene', 'links': ['6532']}]}
+            for uid in ids
+        ]
+    }).encode()
+
+
+@dataclass
+class MockEutils:
+    """The mock server, running in a background thread while used as a context manager.
+
+    Parameters:
+        latency: The time (seconds) before each response is sent.
+        latency_per_record: Additional time (seconds) per requested identifier, simulating the server work.
+        error_rate: The fraction of requests answered with 500 Internal Server Error.
+        rate_limit: The number of requests per second above which the server answers
+            429 Too Many Requests (with a ``Retry-After`` header); by default not limited.
+        retry_after: The value (seconds) of the ``Retry-After`` header sent with 429 responses.
+        search_count: The number of results reported by ESearch.
+        seed: The seed for the error injection, so that the runs are reproducible.
+    """
+    latency: float = 0
+    latency_per_record: float = 0
+    error_rate: float = 0
+    rate_limit: Optional[float] = None
+    retry_after: float = 1
+    search_count: int = 10_000
+    seed: int = 0
+    #: The number of requests by endpoint and status code.
+    counts: Dict[str, Dict[int, int]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._random = Random(self.seed)
+        self._lock = Lock()
+        self._last_allowed = -float('inf')
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/'
+
+    def _status(self, endpoint: str) -> int:
+        with self._lock:
+            if self.rate_limit is not None:
+                now = monotonic()
+                if now - self._last_allowed < 1 / self.rate_limit:
+                    status = 429
+                else:
+                    self._last_allowed = now
+                    status = 200
+            else:
+                status = 200
+            if status == 200 and self._random.random() < self.error_rate:
+                status = 500
+            by_status = self.counts.setdefault(endpoint, {})
+            by_status[status] = by_status.get(status, 0) + 1
+        return status
+
+    def respond(self, endpoint: str, params: Dict[str, str]):
+        """Return `(status, content type, body, headers)` for the request."""
+        status = self._status(endpoint)
+        if status == 429:
+            return status, 'text/plain', b'{"error":"API rate limit exceeded"}', {'Retry-After': str(self.retry_after)}
+        ids = [uid for uid in params.get('id', '').split(',') if uid]
+        sleep(self.latency + self.latency_per_record * len(ids))
+        if status != 200:
+            return status, 'text/plain', b'Internal Server Error', {}
+        if endpoint == 'efetch':
+            return status, 'text/xml', efetch_payload(ids), {}
+        if endpoint == 'esummary':
+            return status, 'application/json', esummary_payload(ids), {}
+        if endpoint == 'elink':
+            return status, 'application/json', elink_payload(ids), {}
+        return status, 'application/json', esearch_payload(params, self.search_count), {}
+
+    def __enter__(self) -> 'MockEutils':
+        self._server = _Server(self)
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def total_requests(self) -> int:
+        return sum(sum(by_status.values()) for by_status in self.counts.values())
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, mock: MockEutils):
+        super().__init__(('127.0.0.1', 0), EutilsHandler)
+        self.mock = mock
+
+    def answer(self, handler: EutilsHandler, endpoint: str, params: Dict[str, List[str]]):
+        return self.mock.respond(endpoint, {key: values[0] for key, values in params.items()})
@@ -0,0 +1,217 @@
+"""Benchmark suite measuring throughput and memory against the local mock E-utilities server.
+
+Run from the repository root with::
+
+    python -m benchmarks.run --output report.json
+    python -m benchmarks.run --compare report.json
+
+The report records the version of the package and the environment, so that reports
+produced for different versions (e.g. before and after a change) can be compared.
+"""
+import json
+import platform
+import subprocess
+import tracemalloc
+import warnings
+from argparse import ArgumentParser
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+from easy_entrez import EntrezAPI
+from easy_entrez.cache import SQLiteResponseCache
+from easy_entrez.parsing import parse_dbsnp_variants
+from easy_entrez.retry import RetryPolicy
+
+from .mock_server import MockEutils
+
+
+@dataclass
+class Result:
+    """The measurements of a single scenario."""
+    name: str
+    #: Wall time (seconds) of the best repetition.
+    seconds: float
+    #: The number of processed items (requests or records, see `unit`).
+    items: int
+    unit: str
+    #: The peak memory (bytes) allocated by Python during the best repetition.
+    peak_memory: int
+    #: The number of requests received by the server (including the failed ones).
+    requests: int
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.seconds if self.seconds else 0
+
+
+def measure(name: str, scenario: Callable[[MockEutils], int], unit: str, repeat: int, **server_options) -> Result:
+    """Run the scenario against a fresh server `repeat` times, keeping the fastest run."""
+    best = None
+    for _ in range(repeat):
+        with MockEutils(**server_options) as server:
+            tracemalloc.start()
+            start = perf_counter()
+            items = scenario(server)
+            elapsed = perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            result = Result(
+                name=name, seconds=elapsed, items=items, unit=unit,
+                peak_memory=peak, requests=server.total_requests()
+            )
+        if best is None or result.seconds < best.seconds:
+            best = result
+    return best
+
+
+def create_api(server: MockEutils, **kwargs) -> EntrezAPI:
+    return EntrezAPI('easy-entrez-benchmark', 'e@mail.com', server=server.url, minimal_interval=0, **kwargs)
+
+
+def variant_ids(n: int) -> List[str]:
+    return [f'rs{i}' for i in range(1, n + 1)]
+
+
+def single_calls(n: int):
+    def scenario(server):
+        with create_api(server) as entrez_api:
+            for _ in range(n):
+                entrez_api.search('cancer', max_results=20)
+        return n
+    return scenario
+
+
+def batch_fetch(n: int, size: int, workers: int):
+    def scenario(server):
+        with create_api(server) as entrez_api:
+            by_batch = entrez_api.in_batches_of(size, sleep_interval=0, workers=workers).fetch(
+                variant_ids(n), max_results=size, database='snp'
+            )
+            assert len(by_batch) == -(-n // size)
+        return n
+    return scenario
+
+
+def fetch_and_parse(n: int, size: int):
+    def scenario(server):
+        with create_api(server) as entrez_api:
+            variants = parse_dbsnp_variants(
+                entrez_api.in_batches_of(size, sleep_interval=0, stream=True).fetch(
+                    variant_ids(n), max_results=size, database='snp'
+                )
+            )
+            assert len(variants.coordinates) == n
+        return n
+    return scenario
+
+
+def cached_fetch(n: int, size: int, rounds: int):
+    def scenario(server):
+        with TemporaryDirectory() as directory:
+            cache = SQLiteResponseCache(Path(directory) / 'cache.sqlite')
+            with create_api(server, cache=cache) as entrez_api:
+                for _ in range(rounds):
+                    entrez_api.in_batches_of(size, sleep_interval=0).fetch(
+                        variant_ids(n), max_results=size, database='snp'
+                    )
+            cache.close()
+        return n * rounds
+    return scenario
+
+
+def unreliable_fetch(n: int, size: int):
+    def scenario(server):
+        with create_api(server) as entrez_api:
+            batch_mode = entrez_api.in_batches_of(
+                size, sleep_interval=0, workers=4, retry_policy=RetryPolicy(max_attempts=10, backoff=0.01)
+            )
+            batch_mode.fetch(variant_ids(n), max_results=size, database='snp')
+        return n
+    return scenario
+
+
+def run_suite(scale: float = 1, repeat: int = 3) -> List[Result]:
+    """Run all scenarios; `scale` multiplies the number of requests and records."""
+    n = max(10, int(1_000 * scale))
+    calls = max(5, int(100 * scale))
+    size = 100
+    latency = dict(latency=0.005, latency_per_record=0.00005)
+    # the warnings from the retried batches would obscure the report
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return [
+            measure('single calls', single_calls(calls), 'requests', repeat, **latency),
+            measure('batch fetch, 1 worker', batch_fetch(n, size, workers=1), 'records', repeat, **latency),
+            measure('batch fetch, 4 workers', batch_fetch(n, size, workers=4), 'records', repeat, **latency),
+            measure('fetch and parse (stream)', fetch_and_parse(n, size), 'records', repeat, **latency),
+            measure('cached fetch, 5 rounds', cached_fetch(n, size, rounds=5), 'records', repeat, **latency),
+            measure(
+                'fetch with 10% errors and throttling', unreliable_fetch(n, size), 'records', repeat,
+                error_rate=0.1, rate_limit=200, retry_after=0.01, **latency
+            ),
+        ]
+
+
+def _version() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def create_report(results: List[Result]) -> dict:
+    return {
+        'version': _version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [{**asdict(result), 'throughput': result.throughput} for result in results]
+    }
+
+
+def format_report(report: dict, baseline: Optional[dict] = None) -> str:
+    previous: Dict[str, dict] = {
+        result['name']: result
+        for result in (baseline or {}).get('results', [])
+    }
+    lines = [f'easy_entrez {report["version"]} on Python {report["python"]}']
+    if baseline:
+        lines.append(f'compared to {baseline["version"]} (on Python {baseline["python"]})')
+    lines.append(f'{"scenario":<40} {"throughput":>20} {"peak memory":>12} {"requests":>9}')
+    for result in report['results']:
+        line = (
+            f'{result["name"]:<40}'
+            f' {result["throughput"]:>10.1f} {result["unit"] + "/s":<9}'
+            f' {result["peak_memory"] / 1024 ** 2:>9.1f} MB'
+            f' {result["requests"]:>9}'
+        )
+        before = previous.get(result['name'])
+        if before and before['throughput']:
+            line += f'  {result["throughput"] / before["throughput"]:.2f}x'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(args=None):
+    parser = ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--scale', type=float, default=1, help='multiplier for the number of records and requests')
+    parser.add_argument('--repeat', type=int, default=3, help='number of repetitions of each scenario')
+    parser.add_argument('--output', type=Path, help='path to save the report (JSON) to')
+    parser.add_argument('--compare', type=Path, help='path to a previously saved report to compare against')
+    options = parser.parse_args(args)
+
+    report = create_report(run_suite(scale=options.scale, repeat=options.repeat))
+    baseline = json.loads(options.compare.read_text()) if options.compare else None
+    print(format_report(report, baseline))
+    if options.output:
+        options.output.write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,9 @@
-from .api import *
\ No newline at end of file
+from .api import *
+
+
+def __getattr__(name: str):
+    # the asyncio machinery is only imported when needed
+    if name == 'AsyncEntrezAPI':
+        from .aio import AsyncEntrezAPI
+        return AsyncEntrezAPI
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
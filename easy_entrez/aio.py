@@ -0,0 +1,155 @@
+"""Asynchronous (asyncio) variant of the API."""
+import asyncio
+from copy import copy
+from functools import partial
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Union
+
+from .api import EntrezAPI, EntrezResponse, _match_all, _read_search_page
+from .batch import run_batches_async
+from .checkpoint import CheckpointStore
+from .export import Compression, ExportFormat, ExportManifest
+from .planner import BatchPlanner
+from .queries import EntrezQuery, SearchQuery
+from .types import EntrezDatabase
+from .retry import RetryPolicy
+
+
+class AsyncEntrezAPI(EntrezAPI):
+    """The asyncio counterpart of :py:class:`~easy_entrez.api.EntrezAPI`.
+
+    Accepts the same parameters; the query methods (:py:meth:`search`, :py:meth:`summarize`,
+    :py:meth:`fetch`, :py:meth:`link`, :py:meth:`get_info` and :py:meth:`find_citations`)
+    return awaitables resolving to :py:class:`~easy_entrez.api.EntrezResponse`.
+    The requests are sent from the default executor of the running loop
+    so the event loop is never blocked, neither by the network nor by the rate limiting.
+
+    >>> async with AsyncEntrezAPI('your-tool-name', 'e@mail.com') as entrez_api:
+    ...     result = await entrez_api.search('cancer AND human[organism]', max_results=10)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.record_cache is not None:
+            raise ValueError('The record cache is not supported by the asynchronous API')
+
+    async def _request(
+        self, query: EntrezQuery, custom_payload=None, stream: bool = False, spool: bool = False
+    ) -> EntrezResponse:
+        url, data = self._prepare_request(query, custom_payload)
+        loop = asyncio.get_running_loop()
+        stream = stream or spool
+
+        if not stream:
+            cached = await loop.run_in_executor(None, partial(self._from_cache, query, data))
+            if cached is not None:
+                return cached
+
+        attempts = []
+        while True:
+            wait = self.rate_limiter.reserve()
+            if wait > 0:
+                self._notify('on_rate_limit_wait', query, wait)
+                await asyncio.sleep(wait)
+            response, attempt = await loop.run_in_executor(
+                None,
+                partial(self._send, query, url, data, number=len(attempts) + 1, stream=stream)
+            )
+            attempts.append(attempt)
+            delay = self._retry_delay(query, attempt, response)
+            if delay is None:
+                break
+            if response is not None:
+                response.close()
+            await asyncio.sleep(delay)
+
+        if attempt.error is not None:
+            raise attempt.error
+
+        if not stream:
+            await loop.run_in_executor(None, partial(self._store_in_cache, query, data, response))
+
+        body = await loop.run_in_executor(None, self._spool, response) if spool else None
+        return EntrezResponse(query=query, response=response, api=self, attempts=attempts, body=body)
+
+    async def search_all(
+        self, term: Union[str, dict], database: EntrezDatabase = 'pubmed', page_size: int = 5_000,
+        max_results: Optional[int] = None, workers: int = 1
+    ) -> AsyncIterator[List[str]]:
+        """Asynchronous generator of the result pages, see :py:meth:`EntrezAPI.search_all`."""
+        if isinstance(term, dict):
+            term = _match_all(**term)
+
+        async def search_page(start: int, size: int):
+            query = SearchQuery(term=term, max_results=size, database=database, start=start)
+            return _read_search_page(await self._request(query=query))
+
+        first_size = page_size if max_results is None else min(page_size, max_results)
+        count, ids = await search_page(0, first_size)
+        total = count if max_results is None else min(count, max_results)
+        yield ids[:total]
+
+        in_flight = deque()
+        try:
+            for start in range(first_size, total, page_size):
+                in_flight.append(asyncio.ensure_future(search_page(start, min(page_size, total - start))))
+                if len(in_flight) >= workers:
+                    yield (await in_flight.popleft())[1]
+            while in_flight:
+                yield (await in_flight.popleft())[1]
+        finally:
+            # do not leave the pages requested ahead running if the consumer stopped early
+            for task in in_flight:
+                task.cancel()
+
+    def in_batches_of(
+        self, size: int = 100, sleep_interval: int = 3, workers: int = 3, stream: bool = False,
+        checkpoint: Optional[CheckpointStore] = None, retry_policy: Optional[RetryPolicy] = None,
+        planner: Optional[BatchPlanner] = None
+    ):
+        """Switch to the batch mode, keeping up to `workers` batches in flight.
+
+        Accepts the same parameters as :py:meth:`EntrezAPI.in_batches_of`, except that the `stream`,
+        `checkpoint` and `planner` are not supported. The rate limiter (shared with this object)
+        keeps the requests under the NCBI cap; the `sleep_interval` is only used to derive
+        the delay before retrying a failed batch (unless a custom `retry_policy` is given).
+        """
+        unsupported = {'stream': stream, 'checkpoint': checkpoint, 'planner': planner}
+        for name, value in unsupported.items():
+            if value not in (None, False):
+                raise ValueError(f'The {name} option of the batch mode is not supported by the asynchronous API')
+        return super().in_batches_of(size, sleep_interval=sleep_interval, workers=workers, retry_policy=retry_policy)
+
+    _run_batches = run_batches_async
+
+    async def _with_identifiers(self, result, identifiers):
+        return super()._with_identifiers(await result, identifiers)
+
+    async def export_fetch(
+        self, ids: List[str], path: Union[str, Path], database: EntrezDatabase = 'pubmed',
+        format: ExportFormat = 'xml', compress: Optional[Compression] = None, max_results: Optional[int] = None
+    ) -> ExportManifest:
+        """Fetch the records and write them directly to a file, see :py:meth:`EntrezAPI.export_fetch`.
+
+        The export is run by the synchronous API (sharing the settings, the transport and the rate limiter
+        of this object) in the default executor of the running loop, so the event loop is not blocked.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self._synchronous().export_fetch, ids, path, database, format, compress, max_results)
+        )
+
+    def _synchronous(self) -> EntrezAPI:
+        api = EntrezAPI.__new__(EntrezAPI)
+        api.__dict__.update(self.__dict__)
+        return api
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+
+__all__ = ['AsyncEntrezAPI']
@@ -1,15 +1,30 @@
-import requests
-from requests import Response
-from typing import Dict, Generic, Type, TypeVar, List, Optional, Union
+from requests import HTTPError, RequestException, Response
+from typing import BinaryIO, Dict, Generic, Iterator, Sequence, Type, TypeVar, List, Optional, Tuple, Union
 from typing_extensions import TypeGuard
 from xml.etree import ElementTree
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
-from time import time, sleep
-
-from .batch import supports_batches
-from .types import ReturnType, DataType, EntrezDatabase, CommandType, Citation
+from dataclasses import replace
+from io import BytesIO
+from json import load as load_json
+from pathlib import Path
+from time import perf_counter, sleep
+from warnings import warn
+
+from .batch import BatchResults, supports_batches, run_batches
+from .cache import SKELETON_UID, RecordCache, ResponseCache, cache_key, record_scope
+from .checkpoint import CheckpointStore
+from .export import Compression, ExportFormat, ExportManifest, check_options, export_responses
+from .instrumentation import RequestHooks
+from .planner import BatchPlanner
+from .rate_limit import RateLimiter, TokenBucket
+from .retry import Attempt, RetryPolicy, NO_RETRY
+from .records import IdentifierMapping, assemble_records, canonical_id, iterparse_records, split_records
+from .transport import Transport, build_response, spool_body
+from .types import ReturnType, DataType, EntrezDatabase, CommandType, Citation, HistoryReference
 from .queries import (
-    EntrezQuery, SearchQuery, SummaryQuery, FetchQuery, LinkQuery, InfoQuery, CitationQuery, uses_query,
+    EntrezQuery, SearchQuery, SummaryQuery, FetchQuery, LinkQuery, InfoQuery, CitationQuery, EPostQuery, uses_query,
 )
 
 
@@ -21,39 +36,168 @@ def _match_all(**kwargs):
 
 
 EntrezQueryT = TypeVar('EntrezQueryT', bound=EntrezQuery)
+_NOT_PARSED = object()
+
+
+def _return_type(declared_type: str) -> ReturnType:
+    if declared_type.startswith('application/json'):
+        return 'json'
+    if declared_type.startswith('text/xml'):
+        return 'xml'
+    raise ValueError(f'Unknown content type: {declared_type}')
 
 
 class EntrezResponse(Generic[DataType, EntrezQueryT]):
     """The wrapper around the Entrez response."""
 
-    def __init__(self, query: EntrezQueryT, response: Response, api: 'EntrezAPI'):
+    def __init__(
+        self, query: EntrezQueryT, response: Response, api: 'EntrezAPI', attempts: Optional[List[Attempt]] = None,
+        body: Optional[BinaryIO] = None
+    ):
         self.query: EntrezQueryT = query
         self.response: Response = response
         self.api: 'EntrezAPI' = api
+        #: Timing of the attempts made to obtain the response (including the retries).
+        self.attempts: List[Attempt] = attempts or []
+        # the body spooled to a temporary file (for responses obtained with ``spool=True``)
+        self._body = body
+        #: The mapping from the identifiers passed by the caller to the ones sent (in the batch mode:
+        #: for the whole collection); only set when the identifiers are normalized, see ``normalize_ids``.
+        self.identifiers: Optional[IdentifierMapping] = None
+        self._data = _NOT_PARSED
+        self._released = False
 
     @property
     def content_type(self) -> ReturnType:
-        declared_type = self.response.headers['Content-Type']
-        if declared_type.startswith('application/json'):
-            return 'json'
-        if declared_type.startswith('text/xml'):
-            return 'xml'
-        raise ValueError(f'Unknown content type: {declared_type}')
+        return _return_type(self.response.headers['Content-Type'])
 
     @property
     def data(self) -> DataType:
+        """The parsed response; parsed on the first access and cached."""
+        if self._released:
+            raise ValueError('The response was released')
+        if self._data is _NOT_PARSED:
+            start = perf_counter()
+            self._data = self._parse()
+            if self.api is not None:
+                self.api._notify('on_parse', self.query, perf_counter() - start)
+        return self._data
+
+    def _parse(self) -> DataType:
+        if self._body is not None:
+            # parse from the spooled file rather than loading the whole body into memory first
+            if self.content_type == 'json':
+                return load_json(self._open_body())
+            if self.content_type == 'xml':
+                return ElementTree.parse(self._open_body()).getroot()
         if self.content_type == 'json':
             return self.response.json()
         if self.content_type == 'xml':
             return ElementTree.fromstring(self.response.content)
         raise ValueError(f'Unknown data data {self.content_type}')
 
+    @property
+    def history(self) -> HistoryReference:
+        """The reference to the UIDs stored on the History server by a search (with ``use_history=True``) or a post."""
+        if self.content_type == 'json':
+            result = self.data.get('esearchresult', {})
+            web_environment, query_key, count = result.get('webenv'), result.get('querykey'), result.get('count')
+        else:
+            data = self.data
+            web_environment, query_key, count = [
+                data.findtext(field)
+                for field in ['WebEnv', 'QueryKey', 'Count']
+            ]
+        if not web_environment or not query_key:
+            raise ValueError(f'The response for {self.query.summary} does not refer to the History server')
+        return HistoryReference(
+            web_environment=web_environment,
+            query_key=query_key,
+            count=int(count) if count is not None else None
+        )
+
+    def iter_records(self, tag: str) -> Iterator[ElementTree.Element]:
+        """Parse the XML body incrementally, yielding the elements with given tag one at a time.
+
+        Each element is cleared and removed from the document once the next one is requested
+        (as are the elements around the records, even if the records are not direct children of the root),
+        so the memory use does not depend on the number of records;
+        extract (or copy) what you need before advancing the iterator.
+        For responses obtained with ``stream=True`` the records are parsed while the body is downloaded
+        (and the body is consumed, so :py:attr:`data` can no longer be used).
+        For responses obtained with ``spool=True`` the records are parsed from the temporary file,
+        which keeps the memory use bounded even for very large bodies.
+
+        Parameters:
+            tag: The tag of the records, e.g. ``'DocumentSummary'`` or ``'PubmedArticle'``;
+                the namespace can be omitted, or provided in the ``{namespace}tag`` notation.
+        """
+        if self.content_type != 'xml':
+            raise ValueError('Can only iterate over records of an XML response')
+        if tag.startswith('{'):
+            def matches(element, depth):
+                return element.tag == tag
+        else:
+            namespaced_suffix = '}' + tag
+
+            def matches(element, depth):
+                return element.tag == tag or element.tag.endswith(namespaced_suffix)
+
+        for root, record in iterparse_records(self._open_body(), matches):
+            yield record
+
+    def _open_body(self) -> BinaryIO:
+        response = self.response
+        if self._released:
+            raise ValueError('The response was released')
+        if self._body is not None:
+            self._body.seek(0)
+            return self._body
+        if response.raw is not None and not response._content_consumed:
+            response.raw.decode_content = True
+            return response.raw
+        return BytesIO(response.content)
+
+    def release(self):
+        """Free the memory held by both the raw body and the parsed data (and delete the spooled body).
+
+        The connection of a streamed response which was not read to the end is closed.
+        Useful when processing large batch results incrementally;
+        accessing :py:attr:`data` of a released response raises :py:class:`ValueError`.
+        """
+        self._data = _NOT_PARSED
+        self._released = True
+        # responses restored from a cache or a checkpoint have no connection
+        if self.response.raw is not None:
+            self.response.close()
+        self.response._content = None
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
     def __repr__(self):
         query = self.query
         response = self.response
         return f'<EntrezResponse status={response.status_code} for {query.summary}>'
 
 
+def _read_search_page(response: EntrezResponse) -> Tuple[int, List[str]]:
+    """Extract the total count and the identifiers from an ESearch response."""
+    if response.response.status_code != 200:
+        raise HTTPError(
+            f'Failed to fetch {response.query.summary} after {len(response.attempts)} attempt(s):'
+            f' status code != 200 (= {response.response.status_code})',
+            response=response.response
+        )
+    if response.content_type == 'json':
+        result = response.data['esearchresult']
+        if 'ERROR' in result:
+            raise ValueError(f'Search failed: {result["ERROR"]}')
+        return int(result['count']), result['idlist']
+    data = response.data
+    return int(data.findtext('Count')), [element.text for element in data.findall('IdList/Id')]
+
+
 def is_xml_response(response: EntrezResponse) -> TypeGuard[EntrezResponse[ElementTree.Element, EntrezQueryT]]:
     """Determine if response is XML."""
     return response.content_type == 'xml'
@@ -82,11 +226,39 @@ class EntrezAPI:
             Please see the API Keys section of |EUtilsHelp|_ for a full discussion of this policy.
         return_type: Retrieval type. Determines the format of the returned output.
         minimal_interval: The time interval (seconds) to be enforced between consecutive requests;
-          by default slightly over 1/3 of a second to comply with the Entrez guidelines,
+          by default slightly over 1/3 of a second to comply with the Entrez guidelines
+          (or slightly over 1/10 of a second if :py:obj:`api_key` is provided),
           but you may increase it if you want to be kind to others,
           or decrease it if you have an API key with an appropriate consent from Entrez.
         timeout: The timeout in seconds (default 10 seconds).
         server: The server address.
+        transport: The HTTP transport keeping a pool of keep-alive connections to the server;
+          by default a new :py:class:`~easy_entrez.transport.Transport` is created.
+          The transport is shared with the batch-mode copies of this object
+          and can be released with :py:meth:`close` or by using the API object as a context manager.
+        rate_limiter: The rate limiter enforcing the request rate; by default a
+          :py:class:`~easy_entrez.rate_limit.TokenBucket` derived from :py:obj:`minimal_interval`.
+          The limiter is shared with the batch-mode copies of this object and is thread-safe,
+          so you can pass the same limiter to multiple API objects using the same API key.
+        retry_policy: The policy for retrying failed requests; by default the requests are not retried
+          (but the batch mode uses its own policy, see :py:meth:`in_batches_of`).
+        cache: The cache for the responses (e.g. :py:class:`~easy_entrez.cache.SQLiteResponseCache`);
+          repeated queries are answered from the cache without waiting for the rate limiter.
+          By default the responses are not cached.
+        record_cache: The cache for the individual records returned by :py:meth:`fetch` and :py:meth:`summarize`
+          (e.g. :py:class:`~easy_entrez.cache.SQLiteRecordCache`); only the identifiers which are not
+          in the cache are requested from the server, and the response is re-assembled from the cached
+          and the newly fetched records (in the order of the requested identifiers).
+          The identifiers for which the server returned no record (or an error) are not cached,
+          and are reported with a warning. By default the records are not cached.
+        normalize_ids: Whether to remove the duplicate identifiers passed to :py:meth:`fetch`,
+          :py:meth:`summarize` and :py:meth:`link`, after converting them to the canonical form
+          (e.g. ``'rs6311'`` and ``6311`` are both sent as ``6311`` for the ``snp`` database);
+          disabled by default. When enabled, the queries (and the keys of the batch-mode results)
+          hold the identifiers as sent, and the :py:class:`~easy_entrez.records.IdentifierMapping`
+          attached to the result as ``identifiers`` fans the results back out to the original identifiers.
+        hooks: The observers of the request life cycle (e.g. :py:class:`~easy_entrez.instrumentation.Metrics`),
+          see :py:class:`~easy_entrez.instrumentation.RequestHooks`. The hooks are shared with the batch-mode copies.
 
     .. |EUtilsHelp| replace:: Entrez Programming Utilities Help
     .. _EUtilsHelp: https://www.ncbi.nlm.nih.gov/books/NBK25497/
@@ -100,21 +272,55 @@ class EntrezAPI:
         email: str,
         api_key: Optional[str] = None,
         return_type: ReturnType = "json",
-        minimal_interval: float = 0.334,
+        minimal_interval: Optional[float] = None,
         timeout: float = 10,
         server: str = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/",
+        transport: Optional[Transport] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: RetryPolicy = NO_RETRY,
+        cache: Optional[ResponseCache] = None,
+        record_cache: Optional[RecordCache] = None,
+        normalize_ids: bool = False,
+        hooks: Sequence[RequestHooks] = ()
     ):
         self.server = server
+        self.transport = transport if transport is not None else Transport()
         self.tool = tool
         self.email = email
         self.api_key = api_key
         self.return_type = return_type
-        self.minimal_interval = minimal_interval
+        if minimal_interval is None:
+            minimal_interval = 0.101 if api_key else 0.334
+        self._minimal_interval = minimal_interval
+        # the default limiter follows the changes of `minimal_interval`, a custom one is left as-is
+        self._default_rate_limiter = rate_limiter is None
+        self.rate_limiter = rate_limiter if rate_limiter is not None else TokenBucket.from_interval(minimal_interval)
+        self.retry_policy = retry_policy
+        self.cache = cache
+        self.record_cache = record_cache
+        self.normalize_ids = normalize_ids
+        self.hooks: List[RequestHooks] = list(hooks)
         self._batch_size: Optional[int] = None
         self._batch_sleep_interval: int = 3
-        self._last_request_time = None
+        self._batch_workers: int = 1
+        self._batch_stream: bool = False
+        self._batch_checkpoint: Optional[CheckpointStore] = None
+        self._batch_planner: Optional[BatchPlanner] = None
         self.timeout = timeout
 
+    @property
+    def minimal_interval(self) -> float:
+        """The interval enforced by the default rate limiter; changing it replaces the limiter."""
+        return self._minimal_interval
+
+    @minimal_interval.setter
+    def minimal_interval(self, minimal_interval: float):
+        self._minimal_interval = minimal_interval
+        if self._default_rate_limiter:
+            self.rate_limiter = TokenBucket.from_interval(minimal_interval)
+        else:
+            warn('The minimal interval has no effect on the custom rate limiter passed to the API')
+
     def _base_params(self) -> Dict[str, str]:
         return {
             'tool': self.tool,
@@ -123,7 +329,7 @@ class EntrezAPI:
             'retmode': self.return_type
         }
 
-    def _request(self, query: EntrezQuery, custom_payload=None) -> EntrezResponse:
+    def _prepare_request(self, query: EntrezQuery, custom_payload=None) -> Tuple[str, Dict[str, str]]:
         url = f'{self.server}{query.endpoint_uri}'
 
         base_params = self._base_params()
@@ -135,30 +341,184 @@ class EntrezAPI:
             **query_params,
             **(custom_payload or {})
         }
-
-        current_time = time()
-        if self._last_request_time is not None:
-            elapsed = current_time - self._last_request_time
-            if elapsed < self.minimal_interval:
-                to_wait = self.minimal_interval - elapsed
-                sleep(to_wait)
-        self._last_request_time = current_time
-
-        if query.method == 'get':
-            response = requests.get(url, params=data, timeout=self.timeout)
-        elif query.method == 'post':
-            response = requests.post(url, data=data, timeout=self.timeout)
+        return url, data
+
+    def _send(
+        self, query: EntrezQuery, url: str, data: Dict[str, str], number: int, stream: bool = False
+    ) -> Tuple[Optional[Response], Attempt]:
+        self._notify('before_send', query, url, data, number)
+        start = perf_counter()
+        try:
+            response = self.transport.request(query.method, url, data=data, timeout=self.timeout, stream=stream)
+        except RequestException as e:
+            response = None
+            attempt = Attempt(number=number, elapsed=perf_counter() - start, error=e)
         else:
-            raise ValueError(f'Incorrect query method: {query.method}')
-
+            attempt = Attempt(number=number, elapsed=perf_counter() - start, status_code=response.status_code)
+        self._notify('after_response', query, attempt, response)
+        return response, attempt
+
+    def _notify(self, event: str, *args):
+        for hook in self.hooks:
+            getattr(hook, event)(*args)
+
+    def _retry_delay(self, query: EntrezQuery, attempt: Attempt, response: Optional[Response]) -> Optional[float]:
+        """Return the time to wait before retrying, or None if the request should not be retried."""
+        policy = self.retry_policy
+        if not policy.should_retry(attempt):
+            return None
+        attempt.delay = policy.delay(attempt, response)
+        reason = attempt.error if attempt.error is not None else f'Status code != 200 (= {attempt.status_code})'
+        warn(
+            f'Failed to fetch {query.summary} (attempt {attempt.number} of {policy.max_attempts}),'
+            f' retrying in {attempt.delay:.2f} seconds. The reason was: {reason}'
+        )
+        self._notify('on_retry', query, attempt, attempt.delay)
+        return attempt.delay
+
+    def _from_cache(self, query: EntrezQuery, data: Dict[str, str]) -> Optional[EntrezResponse]:
+        if self.cache is None:
+            return None
+        response = self.cache.get(cache_key(query.endpoint_uri, data))
+        if response is None:
+            return None
         return EntrezResponse(query=query, response=response, api=self)
 
+    def _store_in_cache(self, query: EntrezQuery, data: Dict[str, str], response: Response):
+        if self.cache is not None and response.status_code == 200:
+            self.cache.set(cache_key(query.endpoint_uri, data), response)
+
+    def _request(
+        self, query: EntrezQuery, custom_payload=None, stream: bool = False, spool: bool = False
+    ) -> EntrezResponse:
+        if (
+            self.record_cache is not None and isinstance(query, SummaryQuery) and query.history is None
+            and not stream and not spool and not custom_payload
+        ):
+            return self._request_records(query)
+        return self._request_response(query, custom_payload, stream=stream, spool=spool)
+
+    def _request_records(self, query: SummaryQuery) -> EntrezResponse:
+        """Answer the query from the record cache, requesting only the missing records from the server."""
+        record_cache = self.record_cache
+        url, data = self._prepare_request(query)
+        scope = record_scope(query.endpoint_uri, data)
+        uids = list(dict.fromkeys(canonical_id(identifier, query.database) for identifier in query.ids))
+        cached = record_cache.get_many(scope, [SKELETON_UID, *uids])
+        skeleton = cached.pop(SKELETON_UID, None)
+        missing = [uid for uid in uids if uid not in cached]
+
+        attempts = []
+        if missing or skeleton is None:
+            fetched = self._request_response(replace(query, ids=missing or uids))
+            if fetched.response.status_code != 200:
+                fetched.query = query
+                return fetched
+            attempts = fetched.attempts
+            content_type = fetched.response.headers.get('Content-Type', '')
+            split = (
+                split_records(fetched.response.content, _return_type(content_type), query.database)
+                if content_type.startswith(('application/json', 'text/xml'))
+                else None
+            )
+            if split is None:
+                # the records cannot be told apart, e.g. for a plain text format
+                fetched.query = query
+                return fetched
+            skeleton_body, new_records = split
+            record_cache.set_many(scope, content_type, {SKELETON_UID: skeleton_body, **new_records})
+            not_returned = [uid for uid in missing if uid not in new_records]
+            if not_returned:
+                warn(
+                    f'The server did not return the records for {len(not_returned)} UID(s) in {query.database}'
+                    f' (these are not cached): {", ".join(not_returned)}'
+                )
+            if not cached:
+                fetched.query = query
+                return fetched
+            skeleton = (content_type, skeleton_body)
+            cached.update({uid: (content_type, record) for uid, record in new_records.items()})
+
+        content_type, skeleton_body = skeleton
+        records = [(uid, cached[uid][1]) for uid in uids if uid in cached]
+        response = build_response(
+            assemble_records(skeleton_body, records, _return_type(content_type)),
+            content_type=content_type, url=url
+        )
+        return EntrezResponse(query=query, response=response, api=self, attempts=attempts)
+
+    def _request_response(
+        self, query: EntrezQuery, custom_payload=None, stream: bool = False, spool: bool = False
+    ) -> EntrezResponse:
+        url, data = self._prepare_request(query, custom_payload)
+        # the spooled body is downloaded in chunks, so it is never held in memory as a whole
+        stream = stream or spool
+
+        if not stream:
+            # cache hits are answered before the rate limiter
+            cached = self._from_cache(query, data)
+            if cached is not None:
+                return cached
+
+        attempts = []
+        while True:
+            wait = self.rate_limiter.acquire()
+            if wait > 0:
+                self._notify('on_rate_limit_wait', query, wait)
+            response, attempt = self._send(query, url, data, number=len(attempts) + 1, stream=stream)
+            attempts.append(attempt)
+            delay = self._retry_delay(query, attempt, response)
+            if delay is None:
+                break
+            if response is not None:
+                # return the connection to the pool
+                response.close()
+            sleep(delay)
+
+        if attempt.error is not None:
+            raise attempt.error
+
+        if not stream:
+            self._store_in_cache(query, data, response)
+
+        body = self._spool(response) if spool else None
+        return EntrezResponse(query=query, response=response, api=self, attempts=attempts, body=body)
+
+    @staticmethod
+    def _spool(response: Response) -> Optional[BinaryIO]:
+        if response.status_code != 200:
+            # the error messages are short, read them as usual
+            response.content
+            return None
+        return spool_body(response)
+
+    def close(self):
+        """Close the connections kept alive by the transport."""
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _replaying(self, response: Response) -> 'EntrezAPI':
+        """Return a copy of the API answering the queries with given (e.g. restored) response instead of sending them."""
+        replay = copy(self)
+        replay._request = lambda query, custom_payload=None, stream=False, spool=False: EntrezResponse(
+            query=query, response=response, api=self
+        )
+        return replay
+
+    _run_batches = run_batches
+
     # TODO: make entrez response a generic and provide better typing of responses
     @uses_query(SearchQuery)
     def search(
         self, term: Union[str, dict], max_results: int,
         database: EntrezDatabase = 'pubmed', min_date=None, max_date=None,
-        ignore_max_results_limit: bool = False
+        ignore_max_results_limit: bool = False, use_history: bool = False,
+        web_environment: Optional[str] = None
     ):
         if isinstance(term, dict):
             term = _match_all(**term)
@@ -166,60 +526,225 @@ class EntrezAPI:
         assert not min_date and not max_date  # TODO
         query = SearchQuery(
             term=term, max_results=max_results, database=database,
-            ignore_max_results_limit=ignore_max_results_limit
+            ignore_max_results_limit=ignore_max_results_limit,
+            use_history=use_history, web_environment=web_environment
         )
         return self._request(query=query)
 
-    def in_batches_of(self, size: int = 100, sleep_interval: int = 3):
+    def search_all(
+        self, term: Union[str, dict], database: EntrezDatabase = 'pubmed', page_size: int = 5_000,
+        max_results: Optional[int] = None, workers: int = 1
+    ) -> Iterator[List[str]]:
+        """Page through all results of the search, yielding the identifiers one page at a time.
+
+        The pages are requested with increasing ``retstart``; note that some databases
+        (notably PubMed) do not return more than the first 10,000 results this way,
+        use the History server (:py:meth:`search` with ``use_history=True``) for larger sets.
+
+        Parameters:
+            term: Entrez text query.
+            database: Database to search.
+            page_size: The number of identifiers requested at once (up to 10,000).
+            max_results: The maximal number of identifiers to return; by default all results are returned.
+            workers: The number of pages requested concurrently (after the first page,
+                which determines the total count); the requests are still throttled by the rate limiter.
+        """
+        if isinstance(term, dict):
+            term = _match_all(**term)
+
+        def search_page(start: int, size: int) -> Tuple[int, List[str]]:
+            query = SearchQuery(term=term, max_results=size, database=database, start=start)
+            return _read_search_page(self._request(query=query))
+
+        first_size = page_size if max_results is None else min(page_size, max_results)
+        count, ids = search_page(0, first_size)
+        total = count if max_results is None else min(count, max_results)
+        yield ids[:total]
+
+        pages = [
+            (start, min(page_size, total - start))
+            for start in range(first_size, total, page_size)
+        ]
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                in_flight = deque()
+                for start, size in pages:
+                    in_flight.append(executor.submit(search_page, start, size))
+                    if len(in_flight) >= workers:
+                        yield in_flight.popleft().result()[1]
+                while in_flight:
+                    yield in_flight.popleft().result()[1]
+            return
+
+        for start, size in pages:
+            yield search_page(start, size)[1]
+
+    @uses_query(EPostQuery)
+    def post(self, ids: List[str], database: EntrezDatabase = 'pubmed', web_environment: Optional[str] = None):
+        """
+        The reference to the uploaded set is available as :py:attr:`EntrezResponse.history`.
+        """
+        self._ensure_list_like(ids)
+        query = EPostQuery(ids=ids, database=database, web_environment=web_environment)
+        return self._request(query=query)
+
+    def in_batches_of(
+        self, size: int = 100, sleep_interval: int = 3, workers: int = 1, stream: bool = False,
+        checkpoint: Optional[CheckpointStore] = None, retry_policy: Optional[RetryPolicy] = None,
+        planner: Optional[BatchPlanner] = None
+    ):
+        """Switch to the batch mode, splitting the identifiers into batches of given size.
+
+        Parameters:
+            size: The number of identifiers in a single batch.
+            sleep_interval: The time (seconds) to sleep after each batch when using a single worker.
+            workers: The number of threads fetching the batches concurrently; with more than one
+                worker the batches are only throttled by the shared :py:obj:`rate_limiter`.
+                If you use more than 10 workers, increase the ``pool_size`` of the transport accordingly.
+            stream: Instead of collecting all responses into a dictionary keyed by batch,
+                return a generator yielding ``(batch_ids, response)`` pairs as each batch completes,
+                so that the responses can be processed and discarded incrementally.
+            checkpoint: The store recording the raw payloads of completed batches
+                (e.g. :py:class:`~easy_entrez.checkpoint.SQLiteCheckpointStore`); when re-running
+                a job with the same identifier, the completed batches are restored from the store
+                and only the missing ones are fetched.
+            retry_policy: The policy for retrying failed batches; by default up to 10 attempts are made,
+                with exponential backoff starting at twice the :py:obj:`sleep_interval`
+                (but not shorter than the default :py:attr:`RetryPolicy.backoff`, even without the sleep).
+                A batch which still fails raises :py:class:`requests.HTTPError`.
+            planner: The planner adapting the batch size (starting from :py:obj:`size`) to the observed
+                latency and size of the responses, see :py:class:`~easy_entrez.planner.BatchPlanner`;
+                by default all batches have the same size. Cannot be combined with a :py:obj:`checkpoint`,
+                as the restored batches need to have the same boundaries.
+        """
+        if planner is not None and checkpoint is not None:
+            raise ValueError('Adaptive batch sizes cannot be used with checkpoints')
         batch_mode = copy(self)
         batch_mode._batch_size = size
         batch_mode._batch_sleep_interval = sleep_interval
+        batch_mode._batch_workers = workers
+        batch_mode._batch_stream = stream
+        batch_mode._batch_checkpoint = checkpoint
+        batch_mode._batch_planner = planner
+        batch_mode.retry_policy = (
+            retry_policy if retry_policy is not None
+            else RetryPolicy(max_attempts=10, backoff=max(sleep_interval * 2, RetryPolicy.backoff))
+        )
         return batch_mode
 
-    @supports_batches
     @uses_query(SummaryQuery)
+    @supports_batches
     def summarize(
-        self, ids: List[str], max_results: int,
-        database: EntrezDatabase = 'pubmed', ignore_max_results_limit: bool = False
+        self, ids: Optional[List[str]], max_results: int,
+        database: EntrezDatabase = 'pubmed', ignore_max_results_limit: bool = False,
+        history: Optional[HistoryReference] = None, start: int = 0
     ):
-        self._ensure_list_like(ids)
+        self._ensure_ids(ids, history)
+        identifiers = self._identifier_mapping(ids, database)
         query = SummaryQuery(
-            ids=ids, max_results=max_results, database=database,
-            ignore_max_results_limit=ignore_max_results_limit
+            ids=self._sent_ids(ids, identifiers), max_results=max_results, database=database,
+            ignore_max_results_limit=ignore_max_results_limit,
+            history=history, start=start
         )
-        return self._request(query=query)
+        return self._with_identifiers(self._request(query=query), identifiers)
 
-    @supports_batches
     @uses_query(FetchQuery)
+    @supports_batches
     def fetch(
-        self, ids: List[str], max_results: int,
+        self, ids: Optional[List[str]], max_results: int,
         database: EntrezDatabase = 'pubmed', return_type: ReturnType = 'xml',
-        ignore_max_results_limit: bool = False
+        ignore_max_results_limit: bool = False, stream: bool = False,
+        history: Optional[HistoryReference] = None, start: int = 0, spool: bool = False
     ):
-        self._ensure_list_like(ids)
+        """
+        The `stream` argument defers downloading of the body until it is read, allowing to parse
+        the records while they arrive using :py:meth:`EntrezResponse.iter_records`.
+
+        The `spool` argument downloads the body in chunks into a temporary file (kept in memory
+        only up to :py:data:`~easy_entrez.transport.SPOOL_MEMORY_LIMIT` bytes), from which it is parsed;
+        combined with :py:meth:`EntrezResponse.iter_records` this keeps the memory use bounded
+        even for payloads of hundreds of megabytes (e.g. from the ``nuccore`` database).
+        Spooled responses are not stored in the response cache.
+        """
+        self._ensure_ids(ids, history)
+        identifiers = self._identifier_mapping(ids, database)
         query = FetchQuery(
-            ids=ids, max_results=max_results, database=database,
-            return_type=return_type, ignore_max_results_limit=ignore_max_results_limit
+            ids=self._sent_ids(ids, identifiers), max_results=max_results, database=database,
+            return_type=return_type, ignore_max_results_limit=ignore_max_results_limit,
+            history=history, start=start
         )
-        return self._request(query=query)
+        return self._with_identifiers(self._request(query=query, stream=stream, spool=spool), identifiers)
+
+    def export_fetch(
+        self, ids: List[str], path: Union[str, Path], database: EntrezDatabase = 'pubmed',
+        format: ExportFormat = 'xml', compress: Optional[Compression] = None, max_results: Optional[int] = None
+    ) -> ExportManifest:
+        """Fetch the records and write them directly to a file.
+
+        In the batch mode (see :py:meth:`in_batches_of`) each batch is written to disk as soon as it arrives,
+        with the body spooled to a temporary file (see :py:meth:`fetch`) rather than parsed in memory,
+        so the memory use does not grow with the number of records; outside of the batch mode
+        all identifiers are fetched in a single request.
+        The XML batches are merged under a single root element (the root of the first batch).
+        The file is only moved to the `path` once complete, and a manifest with the number of records
+        in each batch and the SHA-256 digest of the file is saved next to it
+        (with the ``.manifest.json`` suffix, see :py:func:`~easy_entrez.export.manifest_path`).
+
+        Parameters:
+            ids: The identifiers of the records to fetch.
+            path: The path of the file to write.
+            database: Database to fetch from.
+            format: Either ``'xml'`` to write the records exactly as returned by the server
+                (with the XML declaration and the DOCTYPE of the first batch), or ``'jsonl'`` to write
+                one record per line, converted to a dictionary with :py:func:`~easy_entrez.records.element_to_dict`
+                (the records are always fetched as XML, as EFetch does not return JSON for most databases).
+            compress: The compression (``'gzip'``, ``'bz2'`` or ``'xz'``); by default the file is not compressed.
+            max_results: The maximal number of records in a single response; by default the size of the largest batch.
+        """
+        self._ensure_list_like(ids)
+        check_options(format, compress)
+
+        if self._batch_size is None:
+            response = self.fetch(
+                ids, max_results=max_results or len(ids), database=database, return_type='xml', spool=True
+            )
+            if response.response.status_code != 200:
+                raise HTTPError(
+                    f'Failed to fetch {response.query.summary} after {len(response.attempts)} attempt(s):'
+                    f' status code != 200 (= {response.response.status_code})',
+                    response=response.response
+                )
+            results = [(tuple(ids), response)]
+        else:
+            if max_results is None:
+                planner = self._batch_planner
+                max_results = self._batch_size if planner is None else max(self._batch_size, planner.max_size)
+            streaming = copy(self)
+            streaming._batch_stream = True
+            results = streaming.fetch(
+                ids, max_results=max_results, database=database, return_type='xml', spool=True
+            )
+        return export_responses(results, path, database=database, format=format, compress=compress)
 
-    @supports_batches
     @uses_query(LinkQuery)
+    @supports_batches
     def link(
         self,
         # required
-        ids: List[str],
+        ids: Optional[List[str]],
         database: EntrezDatabase,
         database_from: EntrezDatabase,
         # optional
-        command: CommandType = 'neighbor'
+        command: CommandType = 'neighbor',
+        history: Optional[HistoryReference] = None
     ):
-        self._ensure_list_like(ids)
+        self._ensure_ids(ids, history)
+        identifiers = self._identifier_mapping(ids, database_from)
         query = LinkQuery(
-            ids=ids, database=database, database_from=database_from,
-            command=command
+            ids=self._sent_ids(ids, identifiers), database=database, database_from=database_from,
+            command=command, history=history
         )
-        return self._request(query=query)
+        return self._with_identifiers(self._request(query=query), identifiers)
 
     @uses_query(InfoQuery)
     def get_info(self, database: EntrezDatabase = None):
@@ -231,6 +756,47 @@ class EntrezAPI:
         query = CitationQuery(database=database, citations=citations)
         return self._request(query=query)
 
+    @classmethod
+    def _ensure_ids(cls, ids: Optional[List[str]], history: Optional[HistoryReference]):
+        if ids is None:
+            if history is None:
+                raise ValueError('Either ids or history has to be provided')
+            return
+        cls._ensure_list_like(ids)
+
+    def _identifier_mapping(self, ids: Optional[List[str]], database: EntrezDatabase) -> Optional[IdentifierMapping]:
+        if ids is None or not self.normalize_ids:
+            return None
+        return IdentifierMapping.from_ids(ids, database)
+
+    @staticmethod
+    def _sent_ids(ids: Optional[List[str]], identifiers: Optional[IdentifierMapping]) -> List[str]:
+        if identifiers is not None:
+            return identifiers.unique
+        return ids if ids is not None else []
+
+    def _with_identifiers(self, result, identifiers: Optional[IdentifierMapping]):
+        """Attach the identifier mapping to the response, or to the batch results and each of their responses."""
+        if identifiers is None:
+            return result
+        if isinstance(result, EntrezResponse):
+            result.identifiers = identifiers
+            return result
+        if isinstance(result, BatchResults):
+            result.identifiers = identifiers
+            for response in result.values():
+                response.identifiers = identifiers
+            return result
+        return self._stream_with_identifiers(result, identifiers)
+
+    @staticmethod
+    def _stream_with_identifiers(
+        results: Iterator[Tuple[tuple, 'EntrezResponse']], identifiers: IdentifierMapping
+    ) -> Iterator[Tuple[tuple, 'EntrezResponse']]:
+        for batch, response in results:
+            response.identifiers = identifiers
+            yield batch, response
+
     @staticmethod
     def _ensure_list_like(ids: List[str]):
         """Protect user from accidentally passing and ID, say `'142'` instead of a list,
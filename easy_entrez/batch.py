@@ -1,16 +1,26 @@
+import json
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import copy
+from dataclasses import replace
 from functools import wraps
+from inspect import signature
 from math import ceil
 from time import sleep
-from typing import Sequence
+from typing import Iterator, List, Optional, Sequence, Tuple
 from warnings import warn
 
-from requests import RequestException
+from requests import HTTPError, RequestException
+
+from .planner import PlannerKey
+from .records import IdentifierMapping
+from .retry import Attempt
 
 
 try:
     from tqdm import tqdm
 except ImportError:
-    def tqdm(iterable):
+    def tqdm(iterable, **kwargs):
         return iterable
 
 
@@ -21,46 +31,255 @@ def batches(data, size=100):
     ]
 
 
+def _bound_arguments(self: 'EntrezAPI', func, args, kwargs) -> dict:
+    arguments = signature(func).bind(self, [], *args, **kwargs)
+    arguments.apply_defaults()
+    return arguments.arguments
+
+
+def _planner_key(self: 'EntrezAPI', func, args, kwargs) -> PlannerKey:
+    return func.__name__, _bound_arguments(self, func, args, kwargs).get('database')
+
+
+def _identifier_mapping(self: 'EntrezAPI', func, collection: Sequence, args, kwargs) -> IdentifierMapping:
+    arguments = _bound_arguments(self, func, args, kwargs)
+    # the identifiers passed to `link` come from the `database_from`
+    database = arguments.get('database_from', arguments.get('database'))
+    return IdentifierMapping.from_ids(collection, database)
+
+
+class BatchResults(dict):
+    """The responses keyed by batch (the tuples of identifiers sent in each batch)."""
+    #: The mapping from the identifiers passed by the caller to the ones sent
+    #: (only when the identifiers are normalized, see :py:obj:`EntrezAPI.normalize_ids`).
+    identifiers: Optional[IdentifierMapping] = None
+
+
+def _plan_batches(self: 'EntrezAPI', func, collection: Sequence, args, kwargs) -> Iterator[Tuple[int, Sequence]]:
+    """Yield the consecutive `(i, batch)` pairs, sized by the planner of the batch mode (if any).
+
+    The planned batches are never larger than the `max_results` of the call, so that no records are cut off.
+    """
+    planner = self._batch_planner
+    if planner is None:
+        yield from enumerate(batches(collection, size=self._batch_size))
+        return
+    key = _planner_key(self, func, args, kwargs)
+    max_results = _bound_arguments(self, func, args, kwargs).get('max_results')
+    start = 0
+    i = 0
+    while start < len(collection):
+        size = planner.size_for(key, default=self._batch_size)
+        if max_results is not None:
+            size = min(size, max_results)
+        yield i, collection[start:start + size]
+        start += size
+        i += 1
+
+
+def _checkpoint_key(self: 'EntrezAPI', func, batch: Sequence, args, kwargs) -> str:
+    # bound (with the defaults applied) so that passing an argument by position or by keyword
+    # gives the same key; the first two are the API and the (placeholder) collection
+    arguments = list(_bound_arguments(self, func, args, kwargs).items())[2:]
+    return json.dumps({
+        'method': func.__name__,
+        'ids': [str(identifier) for identifier in batch],
+        'arguments': repr(arguments)
+    })
+
+
+def _restore_batch(self: 'EntrezAPI', func, batch: Sequence, *args, **kwargs) -> Optional['EntrezResponse']:
+    """Return the result of the batch completed previously in the same checkpointed job (if any)."""
+    checkpoint = self._batch_checkpoint
+    if checkpoint is None:
+        return None
+    response = checkpoint.load(_checkpoint_key(self, func, batch, args, kwargs))
+    if response is None:
+        return None
+    return func(self._replaying(response), batch, *args, **kwargs)
+
+
+def _run_batch(self: 'EntrezAPI', func, i: int, batch: Sequence, *args, **kwargs):
+    """Fetch the batch (retried according to the retry policy of the API), raising if it could not be fetched."""
+    batch_result = func(self, batch, *args, **kwargs)
+    _ensure_succeeded(batch_result, i)
+    checkpoint = self._batch_checkpoint
+    if checkpoint is not None:
+        checkpoint.save(_checkpoint_key(self, func, batch, args, kwargs), batch_result.response)
+    return batch_result
+
+
+def _run_planned_batch(
+    self: 'EntrezAPI', func, i: int, batch: Sequence, *args, **kwargs
+) -> List[Tuple[tuple, 'EntrezResponse']]:
+    """Fetch the batch sized by the planner, returning the `(batch_ids, response)` pairs.
+
+    A failed attempt is not retried with the same identifiers: the remaining identifiers are
+    re-split at the size reduced by the planner (the attempts count towards the limit of the retry policy).
+    """
+    planner = self._batch_planner
+    key = _planner_key(self, func, args, kwargs)
+    policy = self.retry_policy
+    single_attempt = copy(self)
+    single_attempt.retry_policy = replace(policy, max_attempts=1)
+
+    results = []
+    pending = list(batch)
+    failures = 0
+    while pending:
+        part = pending[:min(len(batch), planner.size_for(key, default=len(batch)))]
+        try:
+            part_result = func(single_attempt, part, *args, **kwargs)
+        except RequestException as error:
+            planner.record(key, len(part), attempts=[])
+            response = None
+            attempt = Attempt(number=failures + 1, elapsed=0, error=error)
+        else:
+            response = part_result.response
+            planner.record(key, len(part), attempts=part_result.attempts, response=response)
+            if response.status_code == 200:
+                results.append((tuple(part), part_result))
+                pending = pending[len(part):]
+                continue
+            attempt = replace(part_result.attempts[-1], number=failures + 1)
+        failures += 1
+        if not policy.should_retry(attempt):
+            if response is None:
+                raise attempt.error
+            _ensure_succeeded(part_result, i)
+        delay = policy.delay(attempt, response)
+        reason = attempt.error if attempt.error is not None else f'Status code != 200 (= {attempt.status_code})'
+        warn(
+            f'Failed to fetch {i}-th batch (attempt {attempt.number} of {policy.max_attempts}),'
+            f' retrying in {delay:.2f} seconds with a smaller batch. The reason was: {reason}'
+        )
+        if response is not None:
+            response.close()
+        sleep(delay)
+    return results
+
+
+def _ensure_succeeded(batch_result: 'EntrezResponse', i: int):
+    response = batch_result.response
+    if response.status_code != 200:
+        raise HTTPError(
+            f'Failed to fetch {i}-th batch after {len(batch_result.attempts)} attempt(s):'
+            f' status code != 200 (= {response.status_code})',
+            response=response
+        )
+
+
+def iter_batches(self: 'EntrezAPI', func, collection: Sequence, *args, **kwargs) -> Iterator[Tuple[tuple, 'EntrezResponse']]:
+    """Yield `(batch_ids, response)` pairs as the batches complete, in order of the batches.
+
+    With a single worker the batches are fetched one after another, sleeping for the
+    between-batch interval; with multiple workers the batches are dispatched over a thread pool
+    and throttled only by the (shared) rate limiter of the API. At most `workers` batches are
+    fetched ahead of the consumer, so the memory use does not grow with the number of batches.
+    The batches completed previously in a checkpointed job are restored without sending any request.
+    If the batch mode has a planner, the size of each batch is chosen when it is dispatched
+    (and a failed batch is re-split into smaller ones, see :py:func:`_run_planned_batch`).
+    """
+    interval = self._batch_sleep_interval
+    workers = self._batch_workers
+    assert isinstance(self._batch_size, int)
+    all_batches = _plan_batches(self, func, collection, args, kwargs)
+
+    def run(i: int, batch: Sequence) -> List[Tuple[tuple, 'EntrezResponse']]:
+        if self._batch_planner is not None:
+            return _run_planned_batch(self, func, i, batch, *args, **kwargs)
+        return [(tuple(batch), _run_batch(self, func, i, batch, *args, **kwargs))]
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for i, batch in all_batches:
+                restored = _restore_batch(self, func, batch, *args, **kwargs)
+                if restored is not None:
+                    future = Future()
+                    future.set_result([(tuple(batch), restored)])
+                else:
+                    future = executor.submit(run, i, batch)
+                in_flight.append(future)
+                if len(in_flight) >= workers:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+        return
+
+    sent_before = False
+    for i, batch in all_batches:
+        batch_result = _restore_batch(self, func, batch, *args, **kwargs)
+        if batch_result is not None:
+            yield tuple(batch), batch_result
+            continue
+        if sent_before:
+            sleep(interval)
+        yield from run(i, batch)
+        sent_before = True
+
+
+def run_batches(self: 'EntrezAPI', func, collection: Sequence, *args, **kwargs):
+    """Call `func` for each batch of the collection, retrying failed batches.
+
+    Returns a dictionary with results keyed by batch, or, in the streaming mode,
+    a generator of `(batch_ids, response)` pairs, see :py:func:`iter_batches`.
+    """
+    results = tqdm(
+        iter_batches(self, func, collection, *args, **kwargs),
+        # the number of batches is not known in advance when their size is adapted
+        total=ceil(len(collection) / self._batch_size) if self._batch_planner is None else None
+    )
+    if self._batch_stream:
+        return iter(results)
+    return BatchResults(results)
+
+
+async def run_batches_async(self: 'AsyncEntrezAPI', func, collection: Sequence, *args, **kwargs):
+    """Await `func` for each batch of the collection keeping up to `_batch_workers` batches in flight.
+
+    The request rate is capped by the rate limiter of the API and the failed batches are retried
+    according to the retry policy.
+    """
+    import asyncio
+
+    size = self._batch_size
+    assert isinstance(size, int)
+    semaphore = asyncio.Semaphore(self._batch_workers)
+
+    async def run_batch(i, batch):
+        async with semaphore:
+            batch_result = await func(self, batch, *args, **kwargs)
+            _ensure_succeeded(batch_result, i)
+            return batch_result
+
+    all_batches = batches(collection, size=size)
+    results = await asyncio.gather(*[
+        run_batch(i, batch)
+        for i, batch in enumerate(all_batches)
+    ])
+    return BatchResults({
+        tuple(batch): batch_result
+        for batch, batch_result in zip(all_batches, results)
+    })
+
+
 def supports_batches(func):
     """
     Call the decorated functions with the collection from the first argument
-    (second if counting with self) split into batches, resuming on failures
-    with a interval twice the between-batch interval.
+    (second if counting with self) split into batches, retrying failed batches
+    according to the retry policy of the batch mode.
+    Queries without a collection (e.g. referring to the History server) are sent as-is.
     """
 
     @wraps(func)
-    def batches_support_wrapper(self: 'EntrezAPI', collection: Sequence, *args, **kwargs):
-        size = self._batch_size
-        interval = self._batch_sleep_interval
-        if size is not None:
-            assert isinstance(size, int)
-            by_batch = {}
-
-            for i, batch in enumerate(tqdm(batches(collection, size=size))):
-                done = False
-
-                while not done:
-                    reason = None
-                    try:
-                        batch_result = func(self, batch, *args, **kwargs)
-                        code = batch_result.response.status_code
-                        if code == 200:
-                            done = True
-                        else:
-                            reason = f'Status code != 200 (= {code})'
-                    except RequestException as e:
-                        reason = e
-
-                    if not done:
-                        warn(
-                            f'Failed to fetch for {i}-th batch, retrying in {interval * 2} seconds.'
-                            f' The reason was: {reason}'
-                        )
-                        sleep(interval * 2)
-
-                by_batch[tuple(batch)] = batch_result
-                sleep(interval)
-            return by_batch
+    def batches_support_wrapper(self: 'EntrezAPI', collection: Optional[Sequence] = None, *args, **kwargs):
+        if self._batch_size is not None and collection is not None:
+            if not self.normalize_ids:
+                return self._run_batches(func, collection, *args, **kwargs)
+            # remove the duplicates across the batches, not only within each batch
+            identifiers = _identifier_mapping(self, func, collection, args, kwargs)
+            return self._with_identifiers(self._run_batches(func, identifiers.unique, *args, **kwargs), identifiers)
         else:
             return func(self, collection, *args, **kwargs)
 
@@ -70,9 +289,3 @@ def supports_batches(func):
     batches_support_wrapper.__doc__ += '\n    Supports batch mode, see :py:meth:`~EntrezAPI.in_batches_of`.'
 
     return batches_support_wrapper
-
-
-
-
-
-
@@ -0,0 +1,278 @@
+"""Persistent caches of the responses, allowing to skip repeated requests."""
+import hashlib
+import json
+import sqlite3
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Dict, List, Optional, Tuple, Union
+
+from requests import Response
+
+from .transport import build_response
+
+
+#: Parameters which do not affect the result and are therefore not a part of the cache key.
+EXCLUDED_PARAMETERS = {'tool', 'email', 'api_key'}
+
+
+def cache_key(endpoint_uri: str, params: Dict[str, str]) -> str:
+    """Compute the key identifying the request by the endpoint and canonical (sorted) parameters."""
+    canonical = json.dumps([
+        endpoint_uri,
+        sorted(
+            (key, str(value))
+            for key, value in params.items()
+            if key not in EXCLUDED_PARAMETERS and value is not None
+        )
+    ])
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+@dataclass
+class CacheStatistics:
+    """Statistics of the cache use."""
+    #: Number of requests answered from the cache.
+    hits: int = 0
+    #: Number of requests which were not found in the cache (or expired).
+    misses: int = 0
+    #: Number of responses stored.
+    stores: int = 0
+    #: Number of responses removed to fit within the size limit.
+    evictions: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+
+class ResponseCache(ABC):
+    """Base class for the response caches.
+
+    Only successful responses are stored. The responses answered from the cache
+    do not count towards the request rate, so they are not delayed by the rate limiter.
+    """
+
+    def __init__(self):
+        self.statistics = CacheStatistics()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Response]:
+        """Return the cached response, or None if it is not cached (or expired)."""
+
+    @abstractmethod
+    def set(self, key: str, response: Response):
+        """Store the response."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove all responses from the cache."""
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Cache storing the raw response bodies (with their content type) in an SQLite database.
+
+    Parameters:
+        path: The path to the database file; created if it does not exist.
+        ttl: The time (seconds) after which the cached responses expire; by default they never expire.
+        max_size: The maximal total size (bytes) of the stored bodies; when exceeded,
+            the least recently used responses are evicted. By default the size is not limited.
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: Optional[float] = None, max_size: Optional[int] = None):
+        super().__init__()
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                ' key TEXT PRIMARY KEY,'
+                ' content_type TEXT NOT NULL,'
+                ' url TEXT,'
+                ' body BLOB NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' accessed_at REAL NOT NULL'
+                ')'
+            )
+            self._connection.execute('CREATE INDEX IF NOT EXISTS responses_by_access ON responses (accessed_at)')
+
+    def get(self, key: str) -> Optional[Response]:
+        now = time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                'SELECT content_type, url, body, created_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None and self.ttl is not None and row[3] + self.ttl < now:
+                self._connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                row = None
+            if row is None:
+                self.statistics.misses += 1
+                return None
+            self._connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (now, key))
+            self.statistics.hits += 1
+        content_type, url, body, created_at = row
+        return build_response(body, content_type=content_type, url=url)
+
+    def set(self, key: str, response: Response):
+        now = time()
+        body = response.content
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (key, response.headers['Content-Type'], response.url, body, len(body), now, now)
+            )
+            self.statistics.stores += 1
+            if self.max_size is not None:
+                self._evict()
+
+    def _evict(self):
+        (total,) = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()
+        if total <= self.max_size:
+            return
+        to_remove = []
+        for key, size in self._connection.execute('SELECT key, size FROM responses ORDER BY accessed_at'):
+            if total <= self.max_size:
+                break
+            to_remove.append((key,))
+            total -= size
+        self._connection.executemany('DELETE FROM responses WHERE key = ?', to_remove)
+        self.statistics.evictions += len(to_remove)
+
+    @property
+    def size(self) -> int:
+        """The total size (bytes) of the stored bodies."""
+        with self._lock:
+            (total,) = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()
+        return total
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute('SELECT COUNT(*) FROM responses').fetchone()
+        return count
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM responses')
+
+    def close(self):
+        self._connection.close()
+
+    def __repr__(self):
+        return f'<SQLiteResponseCache path={str(self.path)!r} ttl={self.ttl} max_size={self.max_size}>'
+
+
+#: Parameters which do not affect the content of the individual records.
+RECORD_EXCLUDED_PARAMETERS = EXCLUDED_PARAMETERS | {'id', 'retmax', 'retstart'}
+#: The UID under which the skeleton of the response (the response without any records) is stored.
+SKELETON_UID = ''
+
+
+def record_scope(endpoint_uri: str, params: Dict[str, str]) -> str:
+    """Compute the key identifying the kind of records (endpoint, database, format) requested."""
+    return cache_key(endpoint_uri, {
+        key: value
+        for key, value in params.items()
+        if key not in RECORD_EXCLUDED_PARAMETERS
+    })
+
+
+class RecordCache(ABC):
+    """Base class for the caches of individual records returned by EFetch and ESummary.
+
+    The responses are split into per-UID records, so that a query for a partially cached
+    set of identifiers only requests the missing identifiers from the server.
+    The statistics count the individual records.
+    """
+
+    def __init__(self):
+        self.statistics = CacheStatistics()
+
+    @abstractmethod
+    def get_many(self, scope: str, uids: List[str]) -> Dict[str, Tuple[str, bytes]]:
+        """Return the `(content type, record)` pairs for the cached UIDs (skipping the ones not in the cache)."""
+
+    @abstractmethod
+    def set_many(self, scope: str, content_type: str, records: Dict[str, bytes]):
+        """Store the records by UID."""
+
+    @abstractmethod
+    def clear(self):
+        """Remove all records from the cache."""
+
+
+class SQLiteRecordCache(RecordCache):
+    """Cache storing the individual records in an SQLite database.
+
+    Parameters:
+        path: The path to the database file; created if it does not exist.
+        ttl: The time (seconds) after which the cached records expire; by default they never expire.
+    """
+
+    def __init__(self, path: Union[str, Path], ttl: Optional[float] = None):
+        super().__init__()
+        self.path = Path(path)
+        self.ttl = ttl
+        self._lock = Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS records ('
+                ' scope TEXT NOT NULL,'
+                ' uid TEXT NOT NULL,'
+                ' content_type TEXT NOT NULL,'
+                ' body BLOB NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' PRIMARY KEY (scope, uid)'
+                ')'
+            )
+
+    def get_many(self, scope: str, uids: List[str]) -> Dict[str, Tuple[str, bytes]]:
+        oldest = time() - self.ttl if self.ttl is not None else None
+        found = {}
+        with self._lock:
+            # query in chunks to stay under the limit of SQL variables
+            for i in range(0, len(uids), 500):
+                chunk = uids[i:i + 500]
+                rows = self._connection.execute(
+                    'SELECT uid, content_type, body, created_at FROM records'
+                    f' WHERE scope = ? AND uid IN ({",".join("?" * len(chunk))})',
+                    (scope, *chunk)
+                )
+                for uid, content_type, body, created_at in rows:
+                    if oldest is None or created_at >= oldest:
+                        found[uid] = (content_type, body)
+            requested = set(uids) - {SKELETON_UID}
+            self.statistics.hits += len(requested & found.keys())
+            self.statistics.misses += len(requested - found.keys())
+        return found
+
+    def set_many(self, scope: str, content_type: str, records: Dict[str, bytes]):
+        now = time()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?)',
+                [(scope, uid, content_type, body, now) for uid, body in records.items()]
+            )
+            self.statistics.stores += len(records.keys() - {SKELETON_UID})
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute('SELECT COUNT(*) FROM records').fetchone()
+        return count
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM records')
+
+    def close(self):
+        self._connection.close()
+
+    def __repr__(self):
+        return f'<SQLiteRecordCache path={str(self.path)!r} ttl={self.ttl}>'
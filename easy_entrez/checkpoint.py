@@ -0,0 +1,108 @@
+"""Checkpoint stores allowing to resume interrupted batch-mode jobs."""
+import sqlite3
+from abc import ABC, abstractmethod
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Optional, Union
+
+from requests import Response
+
+from .transport import build_response
+
+
+class CheckpointStore(ABC):
+    """Base class for the journals of completed batches.
+
+    Parameters:
+        job_id: The identifier of the job; re-running a job with the same identifier
+            skips the batches completed previously.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+
+    @abstractmethod
+    def load(self, key: str) -> Optional[Response]:
+        """Return the stored response for the batch with given key, or None if the batch was not completed."""
+
+    @abstractmethod
+    def save(self, key: str, response: Response):
+        """Store the response of a completed batch."""
+
+    @abstractmethod
+    def clear(self):
+        """Forget all the batches completed in this job."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """The number of completed batches."""
+
+
+class SQLiteCheckpointStore(CheckpointStore):
+    """Checkpoint store keeping the raw payloads of completed batches in an SQLite database.
+
+    A single database file can hold multiple jobs.
+
+    Parameters:
+        path: The path to the database file; created if it does not exist.
+        job_id: The identifier of the job.
+    """
+
+    def __init__(self, path: Union[str, Path], job_id: str):
+        super().__init__(job_id=job_id)
+        self.path = Path(path)
+        self._lock = Lock()
+        # the batches may be completed in multiple threads; the access is serialized with the lock
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS batches ('
+                ' job_id TEXT NOT NULL,'
+                ' key TEXT NOT NULL,'
+                ' status_code INTEGER NOT NULL,'
+                ' content_type TEXT NOT NULL,'
+                ' url TEXT,'
+                ' body BLOB NOT NULL,'
+                ' completed_at REAL NOT NULL,'
+                ' PRIMARY KEY (job_id, key)'
+                ')'
+            )
+
+    def load(self, key: str) -> Optional[Response]:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT status_code, content_type, url, body FROM batches WHERE job_id = ? AND key = ?',
+                (self.job_id, key)
+            ).fetchone()
+        if row is None:
+            return None
+        status_code, content_type, url, body = row
+        return build_response(body, content_type=content_type, url=url, status_code=status_code)
+
+    def save(self, key: str, response: Response):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (
+                    self.job_id, key, response.status_code, response.headers['Content-Type'],
+                    response.url, response.content, time()
+                )
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM batches WHERE job_id = ?', (self.job_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._connection.execute(
+                'SELECT COUNT(*) FROM batches WHERE job_id = ?', (self.job_id,)
+            ).fetchone()
+        return count
+
+    def close(self):
+        self._connection.close()
+
+    def __repr__(self):
+        return f'<SQLiteCheckpointStore job_id={self.job_id!r} path={str(self.path)!r}>'
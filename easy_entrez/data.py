@@ -1,5 +1,6 @@
 from collections import defaultdict
 from csv import DictReader
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List
 from typing_extensions import TypedDict
@@ -27,6 +28,43 @@ def _read_table(path: Path, index: str) -> Table:
 
 
 data_path = (Path(__file__).parent / 'data').resolve()
-# https://www.ncbi.nlm.nih.gov/books/NBK25497/table/chapter2.T._entrez_unique_identifiers_ui/?report=objectonly
-entrez_databases = _read_table(data_path / 'entrez_databases.tsv', index='E-utility Database Name')
-entrez_database_codes = entrez_databases['columns']['E-utility Database Name']
+_DATABASE_INDEX = 'E-utility Database Name'
+
+
+@lru_cache(maxsize=None)
+def entrez_database_rows() -> Dict[str, Dict[str, str]]:
+    """The rows of the table of Entrez databases keyed by the E-utility database name; read on the first use."""
+    # https://www.ncbi.nlm.nih.gov/books/NBK25497/table/chapter2.T._entrez_unique_identifiers_ui/?report=objectonly
+    with open(data_path / 'entrez_databases.tsv') as f:
+        return {
+            row[_DATABASE_INDEX]: row
+            for row in DictReader(f, delimiter='\t')
+        }
+
+
+def is_known_database(code: str) -> bool:
+    return code in entrez_database_rows()
+
+
+@lru_cache(maxsize=None)
+def _entrez_databases() -> Table:
+    rows = entrez_database_rows()
+    columns = defaultdict(list)
+    for row in rows.values():
+        for field, value in row.items():
+            columns[field].append(value)
+    return Table(columns=columns, rows=rows)
+
+
+@lru_cache(maxsize=None)
+def _entrez_database_codes() -> List[str]:
+    return list(entrez_database_rows())
+
+
+def __getattr__(name: str):
+    # the tables are only read when needed, not on import (and built once)
+    if name == 'entrez_databases':
+        return _entrez_databases()
+    if name == 'entrez_database_codes':
+        return _entrez_database_codes()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
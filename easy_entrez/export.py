@@ -0,0 +1,231 @@
+"""Writing of the fetched records directly to disk, batch by batch."""
+import bz2
+import gzip
+import hashlib
+import json
+import lzma
+import re
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, Union
+from xml.parsers import expat
+
+from typing_extensions import Literal
+
+from .records import element_to_dict, iter_child_records
+
+if TYPE_CHECKING:
+    from .api import EntrezResponse
+
+
+ExportFormat = Literal['xml', 'jsonl']
+Compression = Literal['gzip', 'bz2', 'xz']
+
+_OPENERS: Dict[str, Callable[..., BinaryIO]] = {
+    'gzip': gzip.open,
+    'bz2': bz2.open,
+    'xz': lzma.open,
+}
+
+
+@dataclass
+class ExportedBatch:
+    """The summary of a single batch written to the export file."""
+    #: The number of identifiers requested in the batch.
+    ids: int
+    #: The number of records written.
+    records: int
+    #: The number of attempts made to fetch the batch (zero if it was restored from a checkpoint).
+    attempts: int
+
+
+@dataclass
+class ExportManifest:
+    """The description of an export, saved next to the exported file (see :py:meth:`EntrezAPI.export_fetch`)."""
+    path: str
+    database: str
+    format: ExportFormat
+    compression: Optional[Compression]
+    #: The time (UTC, ISO 8601) when the export was completed.
+    created: str = ''
+    #: The SHA-256 digest of the exported file (as written to disk, i.e. after compression).
+    sha256: str = ''
+    #: The total number of records written.
+    records: int = 0
+    batches: List[ExportedBatch] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ExportManifest':
+        return cls(**{**data, 'batches': [ExportedBatch(**batch) for batch in data['batches']]})
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ExportManifest':
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+
+def manifest_path(path: Union[str, Path]) -> Path:
+    """The path of the manifest for the export file at given path."""
+    path = Path(path)
+    return path.with_name(path.name + '.manifest.json')
+
+
+def _open_output(path: Path, compress: Optional[Compression]) -> BinaryIO:
+    if compress is None:
+        return open(path, 'wb')
+    return _OPENERS[compress](path, 'wb')
+
+
+def check_options(format: ExportFormat, compress: Optional[Compression]):
+    if format not in ('xml', 'jsonl'):
+        raise ValueError(f'Unsupported export format: {format}; use "xml" or "jsonl"')
+    if compress is not None and compress not in _OPENERS:
+        raise ValueError(f'Unsupported compression: {compress}; use one of: {", ".join(_OPENERS)}')
+
+
+@dataclass
+class _RootElement:
+    """The location of the root element in the raw XML body (byte offsets)."""
+    name: str
+    #: The offset of the start tag.
+    start: int
+    #: The offset of the end tag (or of the end of an empty-element tag, e.g. ``<root />``).
+    end: int
+    #: The number of the child elements (records).
+    children: int
+
+
+def _locate_root(body: BinaryIO, chunk_size: int = 1024 ** 2) -> _RootElement:
+    """Find the root element, parsing the body without building the tree."""
+    parser = expat.ParserCreate()
+    depth = 0
+    root = None
+
+    def start_element(name, attributes):
+        nonlocal depth, root
+        if depth == 0:
+            root = _RootElement(name=name, start=parser.CurrentByteIndex, end=-1, children=0)
+        elif depth == 1:
+            root.children += 1
+        depth += 1
+
+    def end_element(name):
+        nonlocal depth
+        depth -= 1
+        if depth == 0:
+            root.end = parser.CurrentByteIndex
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    for chunk in iter(lambda: body.read(chunk_size), b''):
+        parser.Parse(chunk)
+    parser.Parse(b'', True)
+    return root
+
+
+_START_TAG = re.compile(rb'''<[^\s/>]+(?:\s+[^\s=/>]+\s*=\s*(?:"[^"]*"|'[^']*'))*\s*/?>''')
+
+
+def _read_start_tag(body: BinaryIO, root: _RootElement) -> bytes:
+    body.seek(root.start)
+    return _START_TAG.match(body.read(root.end - root.start)).group()
+
+
+def _copy(source: BinaryIO, target: BinaryIO, length: int, chunk_size: int = 1024 ** 2):
+    while length > 0:
+        chunk = source.read(min(chunk_size, length))
+        if not chunk:
+            raise ValueError('The response body ended unexpectedly')
+        target.write(chunk)
+        length -= len(chunk)
+
+
+def _write_xml(
+    output: BinaryIO, response: 'EntrezResponse', opening: Optional[bytes]
+) -> Tuple[int, bytes, bytes]:
+    """Copy the records of the response unchanged, under the root element of the first batch.
+
+    The first batch also provides the prologue (the XML declaration and the DOCTYPE).
+    Returns the number of records and the opening and closing tags of the root.
+    """
+    body = response._open_body()
+    root = _locate_root(body)
+    start_tag = _read_start_tag(body, root)
+    empty = start_tag.endswith(b'/>')
+    tag = start_tag[:-2].rstrip() + b'>' if empty else start_tag
+    if opening is None:
+        body.seek(0)
+        _copy(body, output, root.start)
+        output.write(tag)
+    elif tag != opening:
+        raise ValueError(f'Cannot merge the XML responses with different root elements: {opening!r} and {tag!r}')
+    if not empty:
+        body.seek(root.start + len(start_tag))
+        _copy(body, output, root.end - root.start - len(start_tag))
+    return root.children, tag, b'</' + root.name.encode() + b'>'
+
+
+def _write_jsonl(output: BinaryIO, response: 'EntrezResponse') -> int:
+    """Write each XML record of the response on a separate line, converted to a dictionary."""
+    count = 0
+    for skeleton, record in iter_child_records(response._open_body()):
+        output.write(json.dumps(element_to_dict(record)).encode() + b'\n')
+        count += 1
+    return count
+
+
+def export_responses(
+    results: Iterable[Tuple[tuple, 'EntrezResponse']], path: Union[str, Path], database: str,
+    format: ExportFormat = 'xml', compress: Optional[Compression] = None
+) -> ExportManifest:
+    """Write the records from the `(batch_ids, response)` pairs to the file as the responses arrive.
+
+    The file is first written under a temporary name and only renamed to `path` once all batches
+    were written (followed by the manifest), so an interrupted export never leaves
+    a truncated file which could be mistaken for a complete one.
+    The XML records are copied byte for byte (see :py:func:`_write_xml`), which requires
+    the bodies of the responses to be seekable, i.e. spooled (``spool=True``) or already read.
+    """
+    check_options(format, compress)
+    path = Path(path)
+    partial_path = path.with_name(path.name + '.partial')
+    manifest = ExportManifest(path=str(path), database=database, format=format, compression=compress)
+    opening = closing = None
+
+    try:
+        with _open_output(partial_path, compress) as output:
+            for batch, response in results:
+                if format == 'xml':
+                    count, opening, closing = _write_xml(output, response, opening)
+                else:
+                    count = _write_jsonl(output, response)
+                response.release()
+                manifest.batches.append(ExportedBatch(ids=len(batch), records=count, attempts=len(response.attempts)))
+                manifest.records += count
+            if format == 'xml':
+                if opening is None:
+                    # no records at all; still write a well-formed document
+                    output.write(b'<?xml version="1.0" encoding="UTF-8"?>\n<empty />\n')
+                else:
+                    output.write(closing + b'\n')
+    except BaseException:
+        if partial_path.exists():
+            partial_path.unlink()
+        raise
+
+    manifest.sha256 = _sha256(partial_path)
+    partial_path.replace(path)
+    manifest.created = datetime.now(timezone.utc).isoformat()
+    manifest_path(path).write_text(json.dumps(manifest.to_dict(), indent=2))
+    return manifest
+
+
+def _sha256(path: Path, chunk_size: int = 1024 ** 2) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
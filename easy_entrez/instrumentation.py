@@ -0,0 +1,175 @@
+"""Hooks into the life cycle of the requests, and metrics collected through them."""
+from bisect import bisect_left
+from dataclasses import dataclass
+from math import inf
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from requests import Response
+
+from .queries import EntrezQuery
+from .retry import Attempt
+from .transport import transferred_size
+
+
+class RequestHooks:
+    """Base class for the observers of the requests; override the methods of interest.
+
+    The hooks are called synchronously (from the worker threads in the concurrent batch mode),
+    so they should return quickly and need to be thread-safe.
+    """
+
+    def before_send(self, query: EntrezQuery, url: str, data: Dict[str, str], attempt_number: int):
+        """Called just before the request is sent (after waiting for the rate limiter)."""
+
+    def after_response(self, query: EntrezQuery, attempt: Attempt, response: Optional[Response]):
+        """Called after each attempt; the response is None if the request failed with an error."""
+
+    def on_retry(self, query: EntrezQuery, attempt: Attempt, delay: float):
+        """Called when a failed attempt is going to be retried after `delay` seconds."""
+
+    def on_rate_limit_wait(self, query: EntrezQuery, wait: float):
+        """Called when the request has to wait `wait` seconds for the rate limiter."""
+
+    def on_parse(self, query: EntrezQuery, elapsed: float):
+        """Called after the response body was parsed (on the first access to the data)."""
+
+
+#: Bucket bounds (seconds) for the time measurements.
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, inf)
+#: Bucket bounds for the response sizes.
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2, inf)
+
+
+@dataclass
+class Histogram:
+    """A histogram with fixed buckets, in the style of Prometheus."""
+    #: The upper bounds of the buckets (the last one should be infinite).
+    buckets: Tuple[float, ...]
+    #: The number of observations in each bucket (not cumulative).
+    counts: Optional[List[int]] = None
+    #: The sum of the observed values.
+    sum: float = 0
+    #: The number of observations.
+    count: int = 0
+
+    def __post_init__(self):
+        if self.counts is None:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """The `(upper bound, number of observations less or equal)` pairs."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+#: The recorded metrics: name → (bucket bounds, unit suffix, description).
+METRICS = {
+    'wall_time': (TIME_BUCKETS, 'seconds', 'Time from sending the request until receiving the response headers.'),
+    'response_size': (SIZE_BUCKETS, 'bytes', 'Size of the response body as transferred (compressed, if the server used compression).'),
+    'sleep_time': (TIME_BUCKETS, 'seconds', 'Time spent waiting for the rate limiter and before the retries.'),
+    'parse_time': (TIME_BUCKETS, 'seconds', 'Time spent parsing the response body.'),
+}
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == inf else repr(float(bound))
+
+
+class Metrics(RequestHooks):
+    """Collects histograms of the time and size of the requests, for each endpoint.
+
+    >>> from easy_entrez import EntrezAPI
+    >>> metrics = Metrics()
+    >>> entrez_api = EntrezAPI('your-tool-name', 'e@mail.com', hooks=[metrics])
+    >>> metrics.snapshot()['efetch']['wall_time']['sum']  # doctest: +SKIP
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        # endpoint → metric name → histogram
+        self._histograms: Dict[str, Dict[str, Histogram]] = {}
+        # endpoint → outcome (status code or error name) → count
+        self._outcomes: Dict[str, Dict[str, int]] = {}
+
+    def _observe(self, query: EntrezQuery, metric: str, value: float):
+        with self._lock:
+            by_metric = self._histograms.setdefault(query.endpoint, {})
+            if metric not in by_metric:
+                by_metric[metric] = Histogram(buckets=METRICS[metric][0])
+            by_metric[metric].observe(value)
+
+    def after_response(self, query: EntrezQuery, attempt: Attempt, response: Optional[Response]):
+        self._observe(query, 'wall_time', attempt.elapsed)
+        outcome = str(attempt.status_code) if attempt.error is None else type(attempt.error).__name__
+        with self._lock:
+            by_outcome = self._outcomes.setdefault(query.endpoint, {})
+            by_outcome[outcome] = by_outcome.get(outcome, 0) + 1
+        if response is not None:
+            size = transferred_size(response)
+            if size is not None:
+                self._observe(query, 'response_size', size)
+
+    def on_retry(self, query: EntrezQuery, attempt: Attempt, delay: float):
+        self._observe(query, 'sleep_time', delay)
+
+    def on_rate_limit_wait(self, query: EntrezQuery, wait: float):
+        self._observe(query, 'sleep_time', wait)
+
+    def on_parse(self, query: EntrezQuery, elapsed: float):
+        self._observe(query, 'parse_time', elapsed)
+
+    def snapshot(self) -> dict:
+        """The current values, keyed by endpoint and metric (plus the number of responses by outcome)."""
+        with self._lock:
+            snapshot = {}
+            for endpoint in sorted(self._histograms.keys() | self._outcomes.keys()):
+                by_metric = self._histograms.get(endpoint, {})
+                snapshot[endpoint] = {
+                    metric: {
+                        'count': histogram.count,
+                        'sum': histogram.sum,
+                        'buckets': {_format_bound(bound): count for bound, count in histogram.cumulative()}
+                    }
+                    for metric, histogram in by_metric.items()
+                }
+                snapshot[endpoint]['responses'] = dict(self._outcomes.get(endpoint, {}))
+            return snapshot
+
+    def to_prometheus(self, prefix: str = 'easy_entrez') -> str:
+        """The metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for metric, (buckets, unit, description) in METRICS.items():
+                name = f'{prefix}_{metric}_{unit}'
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for endpoint, by_metric in sorted(self._histograms.items()):
+                    histogram = by_metric.get(metric)
+                    if histogram is None:
+                        continue
+                    for bound, count in histogram.cumulative():
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{_format_bound(bound)}"}} {count}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sum}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {histogram.count}')
+            name = f'{prefix}_responses_total'
+            lines.append(f'# HELP {name} Number of attempts by the outcome (status code or error).')
+            lines.append(f'# TYPE {name} counter')
+            for endpoint, by_outcome in sorted(self._outcomes.items()):
+                for outcome, count in sorted(by_outcome.items()):
+                    lines.append(f'{name}{{endpoint="{endpoint}",outcome="{outcome}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._outcomes.clear()
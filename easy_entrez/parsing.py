@@ -1,19 +1,30 @@
 """Additional parsing utilities, require pandas to be installed."""
 import re
+from array import array
+from collections import abc, deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from warnings import warn
+from pathlib import Path
+from warnings import warn, catch_warnings, simplefilter
 from xml.dom import minidom
 from xml.etree import ElementTree
-from typing import Union, Dict
+from typing import Union, Dict, Iterable, Iterator, List, Tuple
 
 from .api import EntrezResponse, is_xml_response, is_response_for
 from .queries import FetchQuery
 
 try:
-    from pandas import DataFrame, concat
+    import numpy
+    from pandas import Categorical, CategoricalDtype, DataFrame, concat
 except ImportError:
     DataFrame = None
 
+try:
+    import pyarrow
+    from pyarrow import parquet
+except ImportError:
+    pyarrow = None
+
 
 namespaces = {'ns0': 'https://www.ncbi.nlm.nih.gov/SNP/docsum'}
 
@@ -43,9 +54,75 @@ class VariantSet:
     #: Data from DOCSUM field including GENE, HGVS, etc.
     summary: DataFrame
 
+    #: The names of the tables in the Arrow/Parquet representation.
+    TABLES = ('coordinates', 'alt_frequencies', 'preferred_ids', 'summary')
+
     def __repr__(self):
         return f'<VariantSet with {len(self.coordinates)} variants>'
 
+    def to_arrow(self) -> Dict[str, 'pyarrow.Table']:
+        """Convert to Arrow tables keyed by the names in :py:attr:`TABLES`.
+
+        The numeric columns are converted without copying, the categorical columns become
+        dictionary-encoded, and the ``rs_id`` index is kept as a column (restored on conversion back);
+        :py:attr:`preferred_ids` become a table with ``rs_id`` and ``preferred_id`` columns.
+        """
+        _ensure_arrow()
+        return {
+            'coordinates': pyarrow.Table.from_pandas(self.coordinates),
+            'alt_frequencies': pyarrow.Table.from_pandas(self.alt_frequencies, preserve_index=False),
+            'preferred_ids': pyarrow.table({
+                'rs_id': pyarrow.array(list(self.preferred_ids.keys()), type=pyarrow.string()),
+                'preferred_id': pyarrow.array(list(self.preferred_ids.values()), type=pyarrow.string())
+            }),
+            'summary': pyarrow.Table.from_pandas(self.summary)
+        }
+
+    @classmethod
+    def from_arrow(cls, tables: Dict[str, 'pyarrow.Table']) -> 'VariantSet':
+        """Re-create the variant set from the tables returned by :py:meth:`to_arrow`."""
+        _ensure_arrow()
+        preferred_ids = tables['preferred_ids']
+        return cls(
+            coordinates=tables['coordinates'].to_pandas(),
+            alt_frequencies=tables['alt_frequencies'].to_pandas(),
+            preferred_ids=dict(zip(
+                preferred_ids.column('rs_id').to_pylist(),
+                preferred_ids.column('preferred_id').to_pylist()
+            )),
+            summary=tables['summary'].to_pandas()
+        )
+
+    def to_parquet(self, directory: Union[str, Path], compression: str = 'zstd'):
+        """Save as Parquet files (one per table, e.g. ``coordinates.parquet``) in the directory.
+
+        The files keep the dtypes (including categories) and can be read directly
+        by other Arrow-based tools, such as DuckDB or Spark.
+
+        Parameters:
+            directory: The directory to write to; created if it does not exist.
+            compression: The compression codec for the Parquet files.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, table in self.to_arrow().items():
+            parquet.write_table(table, directory / f'{name}.parquet', compression=compression)
+
+    @classmethod
+    def from_parquet(cls, directory: Union[str, Path]) -> 'VariantSet':
+        """Load the variant set saved with :py:meth:`to_parquet`."""
+        _ensure_arrow()
+        directory = Path(directory)
+        return cls.from_arrow({
+            name: parquet.read_table(directory / f'{name}.parquet')
+            for name in cls.TABLES
+        })
+
+
+def _ensure_arrow():
+    if pyarrow is None:
+        raise ValueError('pyarrow is required for the Arrow and Parquet conversion')
+
 
 def parse_docsum(docsum: str) -> dict:
     result = {}
@@ -59,77 +136,262 @@ def parse_docsum(docsum: str) -> dict:
     return result
 
 
-def parse_dbsnp_variants(snps_result: Union[EntrezResponse, Dict[tuple, EntrezResponse]], verbose: bool = False) -> VariantSet:
+def parse_dbsnp_variants(
+    snps_result: Union[EntrezResponse, Dict[tuple, EntrezResponse], Iterable[Tuple[tuple, EntrezResponse]]],
+    verbose: bool = False,
+    workers: int = 1
+) -> VariantSet:
     """Parse coordinates, frequencies and preferred IDs of dbSNP variants.
 
     Parameters:
-        snps_result: result of fetch query in XML format, usually to `'snp'` database
+        snps_result: result of fetch query in XML format, usually to `'snp'` database;
+            in batch mode either the dictionary of results keyed by batch, or the iterator
+            of `(batch_ids, response)` pairs returned in the streaming mode
+            (in which case each response is parsed as soon as it arrives).
         verbose: whether to print out full problematic XML if SPDI cannot be parsed
+        workers: the number of processes parsing the batches in parallel (batch mode only);
+            the result is the same (and in the same order) as when parsing in a single process.
+            Where the processes are started with *spawn* (the default on Windows and macOS)
+            each worker imports the main module, so a script using ``workers > 1`` has to guard
+            its entry point with ``if __name__ == '__main__':``, as for any :py:mod:`multiprocessing` code.
     """
     if isinstance(snps_result, dict):
+        snps_result = snps_result.items()
+    if not isinstance(snps_result, EntrezResponse) and isinstance(snps_result, abc.Iterable):
         coordinates = []
         alt_frequencies = []
         preferred_ids = {}
         summaries = []
-        for result in snps_result.values():
-            parsed = parse_dbsnp_variants(result)
+        # the responses yielded in the streaming mode are not referenced anywhere else
+        release = isinstance(snps_result, abc.Iterator)
+        responses = (result for batch, result in snps_result)
+        for parsed in _parse_batches(responses, workers=workers, verbose=verbose, release=release):
             coordinates.append(parsed.coordinates)
             alt_frequencies.append(parsed.alt_frequencies)
             preferred_ids.update(parsed.preferred_ids)
-            summaries.append(parsed.alt_frequencies)
+            summaries.append(parsed.summary)
         return VariantSet(
-            coordinates=concat(coordinates),
-            alt_frequencies=concat(alt_frequencies),
+            coordinates=_concat(coordinates),
+            alt_frequencies=_concat(alt_frequencies),
             preferred_ids=preferred_ids,
-            summary=concat(summaries)
+            summary=_concat(summaries)
         )
 
+    _ensure_parsable(snps_result)
+    return _parse_dbsnp_xml(snps_result.data, ids=snps_result.query.ids, verbose=verbose)
+
+
+def _ensure_parsable(snps_result: EntrezResponse):
     if DataFrame is None:
         raise ValueError('pandas is required for parser_dbsnp_variants')
     if not is_xml_response(snps_result):
         raise ValueError('Can only parse an XML response')
     if not is_response_for(snps_result, FetchQuery):
         raise ValueError('Expected FetchQuery response')
-    snps = snps_result.data
 
-    results = []
-    alt_frequencies = []
-    preferred_id = {}
-    summaries = []
+
+def _parse_batches(responses: Iterable[EntrezResponse], workers: int, verbose: bool, release: bool) -> Iterator[VariantSet]:
+    """Parse the batch responses (in a pool of processes if `workers` > 1), yielding the results in order."""
+    if workers <= 1:
+        for result in responses:
+            parsed = parse_dbsnp_variants(result, verbose=verbose)
+            if release:
+                result.release()
+            yield parsed
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque()
+        for result in responses:
+            _ensure_parsable(result)
+            in_flight.append(executor.submit(
+                _parse_dbsnp_content, result.response.content, list(result.query.ids), verbose
+            ))
+            if release:
+                result.release()
+            # bound the number of raw bodies waiting to be parsed
+            if len(in_flight) >= 2 * workers:
+                yield _reraise_warnings(*in_flight.popleft().result())
+        while in_flight:
+            yield _reraise_warnings(*in_flight.popleft().result())
+
+
+def _parse_dbsnp_content(content: bytes, ids: list, verbose: bool) -> Tuple[VariantSet, List[str]]:
+    """Parse the raw body in a worker process, capturing the warnings to re-emit them in the main process."""
+    with catch_warnings(record=True) as captured:
+        simplefilter('always')
+        parsed = _parse_dbsnp_xml(ElementTree.fromstring(content), ids=ids, verbose=verbose)
+    return parsed, [str(warning.message) for warning in captured]
+
+
+def _reraise_warnings(parsed: VariantSet, messages: List[str]) -> VariantSet:
+    for message in messages:
+        warn(message)
+    return parsed
+
+
+_FREQUENCY_PATTERN = re.compile(r'(?P<alt>(?:A|C|T|G|-)+)=(?P<frequency>\d+.\d*)/(?P<count>\d+)')
+_DOCSUM_NAMESPACE = '{' + namespaces['ns0'] + '}'
+
+
+def _read_text(element: ElementTree.Element) -> str:
+    return element.text
+
+
+def _read_mafs(element: ElementTree.Element) -> list:
+    """Read GLOBAL_MAFS into a list of (study, [FREQ texts]) tuples."""
+    mafs = []
+    for maf in element:
+        studies = []
+        frequencies = []
+        for child in maf:
+            tag = child.tag
+            if tag == _DOCSUM_NAMESPACE + 'STUDY':
+                studies.append(child.text)
+            elif tag == _DOCSUM_NAMESPACE + 'FREQ':
+                frequencies.append(child.text)
+        assert len(studies) == 1
+        mafs.append((studies[0], frequencies))
+    return mafs
+
+
+# readers for the children of DocumentSummary used by the parser, dispatched by tag
+_DOCUMENT_SUMMARY_FIELDS = {
+    _DOCSUM_NAMESPACE + name: (name, reader)
+    for name, reader in {
+        'error': _read_text,
+        'SNP_ID': _read_text,
+        'GLOBAL_MAFS': _read_mafs,
+        'SPDI': _read_text,
+        'FXN_CLASS': _read_text,
+        'DOCSUM': _read_text,
+        'CHRPOS': _read_text,
+        'CHRPOS_PREV_ASSM': _read_text,
+        'MERGED_SORT': _read_text,
+    }.items()
+}
+
+
+def _read_document_summary(snp: ElementTree.Element) -> dict:
+    """Visit the children of the DocumentSummary once, reading the fields used by the parser."""
+    fields = {}
+    for child in snp:
+        field = _DOCUMENT_SUMMARY_FIELDS.get(child.tag)
+        if field is not None:
+            name, reader = field
+            # only the first occurrence is used
+            if name not in fields:
+                fields[name] = reader(child)
+    return fields
+
+
+class _SparseColumns:
+    """Columns of rows with varying keys; missing values are filled with None."""
+
+    def __init__(self):
+        self.columns: Dict[str, list] = {}
+        self.length = 0
+
+    def append(self, row: dict):
+        for key, value in row.items():
+            if key not in self.columns:
+                self.columns[key] = [None] * self.length
+            self.columns[key].append(value)
+        self.length += 1
+        for column in self.columns.values():
+            if len(column) < self.length:
+                column.append(None)
+
+
+class _VariantColumns:
+    """Column-oriented accumulator of the parsed variants.
+
+    Numeric columns are kept in typed arrays and the low-cardinality text columns
+    are converted to categoricals, avoiding a dictionary per row and the dtype inference.
+    """
+    CATEGORICAL = {'chrom', 'chrom_prev', 'consequence', 'study'}
+
+    def __init__(self):
+        self.coordinates = {
+            'rs_id': [],
+            'ref': [],
+            'alts': [],
+            'chrom': [],
+            'pos': array('q'),
+            'chrom_prev': [],
+            'pos_prev': array('q'),
+            'consequence': []
+        }
+        self.alt_frequencies = {
+            'rs_id': [],
+            'allele': [],
+            'source_frequency': array('d'),
+            'total_count': array('q'),
+            'study': []
+        }
+        self.preferred_ids = {}
+        self.summary = _SparseColumns()
+
+    def _frame(self, columns: Dict[str, Union[list, array]]) -> DataFrame:
+        return DataFrame({
+            name: (
+                Categorical(values) if name in self.CATEGORICAL
+                else numpy.array(values, dtype=values.typecode) if isinstance(values, array)
+                else values
+            )
+            for name, values in columns.items()
+        })
+
+    def to_variant_set(self) -> VariantSet:
+        alt_frequencies = self._frame(self.alt_frequencies)
+        alt_frequencies['count'] = alt_frequencies['source_frequency'] * alt_frequencies['total_count']
+        summary = DataFrame(self.summary.columns) if self.summary.columns else DataFrame({'rs_id': []})
+        return VariantSet(
+            coordinates=self._frame(self.coordinates).set_index('rs_id'),
+            alt_frequencies=alt_frequencies,
+            preferred_ids=self.preferred_ids,
+            summary=summary.set_index('rs_id')
+        )
+
+
+def _parse_dbsnp_xml(snps: ElementTree.Element, ids: list, verbose: bool = False) -> VariantSet:
+    columns = _VariantColumns()
+    coordinates = columns.coordinates
+    alt_frequencies = columns.alt_frequencies
 
     for i, snp in enumerate(snps):
-        error = snp.find('.//ns0:error', namespaces)
-        if error is not None:
-            warn(f'Failed to retrieve {snps_result.query.ids[i]} due to error: {error.text}')
+        fields = _read_document_summary(snp)
+        if 'error' in fields:
+            warn(f'Failed to retrieve {ids[i]} due to error: {fields["error"]}')
             continue
         rs_id = snp.attrib['uid']
-        spdi_text = snp.find('.//ns0:SPDI', namespaces).text
+        spdi_text = fields.get('SPDI')
         if not spdi_text:
-            warn(f'Failed to retrieve {snps_result.query.ids[i]}: SPDI not found')
+            warn(f'Failed to retrieve {ids[i]}: SPDI not found')
             if verbose:
                 print(xml_to_string(snp))
             continue
         spdi = spdi_text.split(',')
-        chrom, pos = snp.find('.//ns0:CHRPOS', namespaces).text.split(':')
-        chrom_prev, pos_prev = snp.find('.//ns0:CHRPOS_PREV_ASSM', namespaces).text.split(':')
-        sig_class = snp.find('.//ns0:FXN_CLASS', namespaces).text
+        chrom, pos = fields['CHRPOS'].split(':')
+        chrom_prev, pos_prev = fields['CHRPOS_PREV_ASSM'].split(':')
+        sig_class = fields['FXN_CLASS']
 
-        doc_sum = snp.find('.//ns0:DOCSUM', namespaces).text
+        doc_sum = fields['DOCSUM']
         try:
             doc_sum = parse_docsum(doc_sum)
-            summaries.append({
+            columns.summary.append({
                 **doc_sum,
                 'rs_id': f'rs{rs_id}'
             })
         except Exception as e:
             warn(f'Failed to parse DOCSUM: {e}')
 
-        merged_into = snp.find('.//ns0:SNP_ID', namespaces).text
+        merged_into = fields['SNP_ID']
         if rs_id != merged_into:
-            was_merged = snp.find('.//ns0:MERGED_SORT', namespaces).text
+            was_merged = fields['MERGED_SORT']
             assert was_merged == '1'
 
-        preferred_id[f'rs{rs_id}'] = f'rs{merged_into}'
+        columns.preferred_ids[f'rs{rs_id}'] = f'rs{merged_into}'
 
         expected_ref = {
             s.split(':')[-2]
@@ -142,49 +404,42 @@ def parse_dbsnp_variants(snps_result: Union[EntrezResponse, Dict[tuple, EntrezRe
             for s in spdi
         ]
 
-        for maf in snp.findall('.//ns0:GLOBAL_MAFS/ns0:MAF', namespaces):
-            studies = maf.findall('.//ns0:STUDY', namespaces)
-            assert len(studies) == 1
-            study = list(studies)[0].text
-            for frequency in maf.findall('.//ns0:FREQ', namespaces):
-                match_obj = re.match(
-                    r'(?P<alt>(?:A|C|T|G|-)+)=(?P<frequency>\d+.\d*)/(?P<count>\d+)',
-                    frequency.text
-                )
+        for study, frequencies in fields.get('GLOBAL_MAFS', []):
+            for frequency in frequencies:
+                match_obj = _FREQUENCY_PATTERN.match(frequency)
                 if not match_obj:
-                    warn(f'Unrecognised variant FREQ format: {frequency.text} for rs{rs_id}')
+                    warn(f'Unrecognised variant FREQ format: {frequency} for rs{rs_id}')
                     continue
-                match = match_obj.groupdict()
-                freq = float(match['frequency'])
+                alt, freq, count = match_obj.groups()
+                freq = float(freq)
                 if freq > 1:
                     warn(f'frequency {freq} > 1 for variant: rs{rs_id}')
                     continue
-                alt_frequencies.append({
-                    'rs_id': f'rs{rs_id}',
-                    'allele': match['alt'],
-                    'source_frequency': freq,
-                    'total_count': int(match['count']),
-                    'study': study,
-                    'count': freq * int(match['count']),
-                })
-
-        results.append({
-            'rs_id': f'rs{rs_id}',
-            'ref': list(expected_ref)[0],
-            'alts': ','.join(expected_alt),
-            'chrom': chrom,
-            'pos': int(pos),
-            'chrom_prev': chrom_prev,
-            'pos_prev': int(pos_prev),
-            'consequence': sig_class
-        })
+                alt_frequencies['rs_id'].append(f'rs{rs_id}')
+                alt_frequencies['allele'].append(alt)
+                alt_frequencies['source_frequency'].append(freq)
+                alt_frequencies['total_count'].append(int(count))
+                alt_frequencies['study'].append(study)
 
-    return VariantSet(
-        coordinates=DataFrame(results).set_index('rs_id'),
-        alt_frequencies=DataFrame(alt_frequencies),
-        preferred_ids=preferred_id,
-        summary=DataFrame(summaries).set_index('rs_id')
-    )
+        coordinates['rs_id'].append(f'rs{rs_id}')
+        coordinates['ref'].append(list(expected_ref)[0])
+        coordinates['alts'].append(','.join(expected_alt))
+        coordinates['chrom'].append(chrom)
+        coordinates['pos'].append(int(pos))
+        coordinates['chrom_prev'].append(chrom_prev)
+        coordinates['pos_prev'].append(int(pos_prev))
+        coordinates['consequence'].append(sig_class)
+
+    return columns.to_variant_set()
+
+
+def _concat(frames: List[DataFrame]) -> DataFrame:
+    """Concatenate frames restoring the categorical columns (which differ in categories between batches)."""
+    merged = concat(frames)
+    for name, dtype in frames[0].dtypes.items():
+        if isinstance(dtype, CategoricalDtype) and not isinstance(merged[name].dtype, CategoricalDtype):
+            merged[name] = merged[name].astype('category')
+    return merged
 
 
 __all__ = ['VariantSet', 'parse_dbsnp_variants', 'xml_to_string', 'namespaces']
@@ -0,0 +1,79 @@
+"""Adaptive sizing of the batches, tuned by the observed latency and size of the responses."""
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from requests import Response
+
+from .retry import Attempt
+from .transport import response_size
+
+
+#: The batches are tuned separately for each method (e.g. ``'fetch'``) and database.
+PlannerKey = Tuple[str, Optional[str]]
+
+
+@dataclass
+class BatchPlanner:
+    """Chooses the size of the next batch based on how the previous batches went.
+
+    The size grows by the :py:obj:`growth` factor while the batches complete well under
+    the :py:obj:`target_latency` and :py:obj:`target_bytes`, is scaled down proportionally when
+    a batch exceeds either target, and is cut by the :py:obj:`shrink` factor when a batch
+    hit a timeout, a connection error or a server error (5xx); the identifiers of the failed batch
+    are then re-tried in batches of the reduced size (instead of retrying the whole batch).
+    The batches are never larger than the ``max_results`` of the call.
+    The tuned sizes are remembered per method and database, so a planner can be reused
+    across jobs (or shared by multiple batch-mode objects).
+
+    Parameters:
+        min_size: The smallest batch size.
+        max_size: The largest batch size.
+        target_latency: The time (seconds) a single batch request should take at most.
+        target_bytes: The size (bytes) of a single response should be at most.
+        growth: The factor by which the size grows after a fast and small batch.
+        shrink: The factor by which the size is reduced after a failed batch.
+    """
+    min_size: int = 10
+    max_size: int = 5_000
+    target_latency: float = 10
+    target_bytes: int = 20 * 1024 ** 2
+    growth: float = 2
+    shrink: float = 0.5
+    #: The tuned batch sizes by method and database.
+    sizes: Dict[PlannerKey, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._lock = Lock()
+
+    def _clamp(self, size: float) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def size_for(self, key: PlannerKey, default: int) -> int:
+        """The size of the next batch (the `default` until there is any feedback for the key)."""
+        with self._lock:
+            return self.sizes.get(key, self._clamp(default))
+
+    def record(self, key: PlannerKey, size: int, attempts: List[Attempt], response: Optional[Response] = None):
+        """Adjust the size after a batch of given size was attempted (and possibly completed with the response)."""
+        failed = any(
+            attempt.error is not None or (attempt.status_code or 0) >= 500
+            for attempt in attempts
+        )
+        if failed or response is None:
+            new_size = size * self.shrink
+        else:
+            latency = attempts[-1].elapsed if attempts else 0
+            n_bytes = response_size(response)
+            ratios = [latency / self.target_latency]
+            if n_bytes is not None:
+                ratios.append(n_bytes / self.target_bytes)
+            load = max(ratios)
+            if load > 1:
+                new_size = size / load
+            elif load < 0.5:
+                new_size = size * self.growth
+            else:
+                new_size = size
+        with self._lock:
+            self.sizes[key] = self._clamp(new_size)
@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, List, Iterable, Type
+from functools import lru_cache
+from types import MethodType
+from typing import Dict, List, Iterable, Optional, Type
 from typing_extensions import Literal
 from warnings import warn
 
-from .types import ReturnType, EntrezDatabase, Command, Identifier, Example, Citation
-from .data import entrez_databases, entrez_database_codes
+from .types import ReturnType, EntrezDatabase, Command, Identifier, Example, Citation, HistoryReference
+from . import data
 
 
 @dataclass
@@ -28,7 +30,7 @@ class EntrezQuery(ABC):
         return f'{self.endpoint}{self.endpoint_suffix}'
 
     def validate(self):
-        if self.database not in entrez_database_codes and self.database is not None:
+        if self.database is not None and not data.is_known_database(self.database):
             warn(f'Unknown database: {self.database}')
 
     def __post_init__(self):
@@ -36,7 +38,7 @@ class EntrezQuery(ABC):
 
     @property
     def uid_meaning(self):
-        return entrez_databases
+        return data.entrez_databases
 
     def to_params(self) -> Dict[str, str]:
         # Convert to params which can be accepted by Entrez
@@ -88,11 +90,20 @@ class SearchQuery(EntrezQuery):
             Experimentation has shown that some databases allow for higher limits, but
             as this is not documented, setting higher limits needs to be explicitly
             enabled here. Use at your own risk of hard to predict errors.
+        use_history: Store the matching UIDs on the History server (``usehistory=y``), so that
+            they can be retrieved by :py:class:`SummaryQuery`, :py:class:`FetchQuery` or :py:class:`LinkQuery`
+            without sending them back and forth, see :py:attr:`~easy_entrez.api.EntrezResponse.history`.
+        web_environment: The Web environment to which the results should be appended
+            (only used with :py:obj:`use_history`); by default a new environment is created.
+        start: The index of the first UID to return (``retstart``), allowing to page through the results.
     """
     endpoint = 'esearch'
     term: str
     max_results: int
     ignore_max_results_limit: bool = False
+    use_history: bool = False
+    web_environment: Optional[str] = None
+    start: int = 0
 
     def validate(self):
         super().validate()
@@ -103,6 +114,12 @@ class SearchQuery(EntrezQuery):
         params = super().to_params()
         params['retmax'] = str(self.max_results)
         params['term'] = self.term
+        if self.start:
+            params['retstart'] = str(self.start)
+        if self.use_history:
+            params['usehistory'] = 'y'
+            if self.web_environment:
+                params['WebEnv'] = self.web_environment
         return params
 
     @property
@@ -117,6 +134,47 @@ def _serialize_ids(ids: Iterable[Identifier]) -> str:
     ])
 
 
+def _history_params(history: Optional[HistoryReference]) -> Dict[str, str]:
+    if history is None:
+        return {}
+    return {'WebEnv': history.web_environment, 'query_key': str(history.query_key)}
+
+
+@dataclass
+class EPostQuery(EntrezQuery):
+    """
+    Note: enforces xml as it is the only supported :py:obj:`return_type` for the EPost endpoint.
+
+    Functionality:
+        - Uploads a list of UIDs to the Entrez History server
+        - Appends a list of UIDs to an existing set of UID lists attached to a Web environment
+
+    Parameters:
+        database: Database containing the UIDs in the input list.
+        ids: UID list. All of the UIDs must be from the database specified by :py:obj:`database`.
+        web_environment: The Web environment to which the UIDs should be appended;
+            by default a new environment is created.
+    """
+    endpoint = 'epost'
+    method = 'post'
+    ids: List[Identifier]
+    web_environment: Optional[str] = None
+    return_type: ReturnType = 'xml'
+
+    def to_params(self) -> Dict[str, str]:
+        params = super().to_params()
+        params['retmode'] = self.return_type
+        params['id'] = _serialize_ids(self.ids)
+        if self.web_environment:
+            params['WebEnv'] = self.web_environment
+        return params
+
+    @property
+    def summary(self):
+        ids_summary = self.ids if len(self.ids) <= 5 else f'{len(self.ids)} ids'
+        return f'{self.__class__.__name__} {ids_summary} in {self.database}'
+
+
 @dataclass
 class SummaryQuery(EntrezQuery):
     """Functionality:
@@ -136,12 +194,17 @@ class SummaryQuery(EntrezQuery):
             Experimentation has shown that some databases allow for higher limits, but
             as this is not documented, setting higher limits needs to be explicitly
             enabled here. Use at your own risk of hard to predict errors.
+        history: The set of UIDs stored on the History server to use instead of (or in addition to) :py:obj:`ids`.
+        start: The index of the first record of the :py:obj:`history` set to retrieve (``retstart``),
+            allowing to page through large sets with :py:obj:`max_results` records per page.
     """
     endpoint = 'esummary'
     method = 'post'
     ids: List[Identifier]
     max_results: int
     ignore_max_results_limit: bool = False
+    history: Optional[HistoryReference] = None
+    start: int = 0
 
     def validate(self):
         super().validate()
@@ -151,12 +214,19 @@ class SummaryQuery(EntrezQuery):
     def to_params(self) -> Dict[str, str]:
         params = super().to_params()
         params['retmax'] = str(self.max_results)
-        params['id'] = _serialize_ids(self.ids)
+        if self.ids:
+            params['id'] = _serialize_ids(self.ids)
+        params.update(_history_params(self.history))
+        if self.start:
+            params['retstart'] = str(self.start)
         return params
 
     @property
     def summary(self):
-        ids_summary = self.ids if len(self.ids) <= 5 else f'{len(self.ids)} ids'
+        if not self.ids and self.history is not None:
+            ids_summary = f'history #{self.history.query_key} from {self.start}'
+        else:
+            ids_summary = self.ids if len(self.ids) <= 5 else f'{len(self.ids)} ids'
         return f'{self.__class__.__name__} {ids_summary} in {self.database}'
 
 
@@ -212,6 +282,8 @@ class LinkQuery(EntrezQuery):
         ids: UID list. Either a single UID or a comma-delimited list of UIDs may be provided.
             All of the UIDs must be from the database specified by :py:obj:`database_from`
         command: ELink command mode. The command mode specifies which function ELink will perform.
+        history: The set of UIDs (from :py:obj:`database_from`) stored on the History server
+            to use instead of :py:obj:`ids`.
 
 
     """
@@ -221,11 +293,14 @@ class LinkQuery(EntrezQuery):
 
     database_from: EntrezDatabase
     command: Command = 'neighbor'
+    history: Optional[HistoryReference] = None
 
     def to_params(self) -> Dict[str, str]:
         params = super().to_params()
         params['dbfrom'] = self.database_from
-        params['id'] = _serialize_ids(self.ids)
+        if self.ids:
+            params['id'] = _serialize_ids(self.ids)
+        params.update(_history_params(self.history))
         params['cmd'] = self.command
         return params
 
@@ -265,77 +340,86 @@ class CitationQuery(EntrezQuery):
         return params
 
 
-EXAMPLES: Dict[Type[EntrezQuery], List[Example]] = {
-    LinkQuery: [
-        Example(
-            name='Link from protein to gene',
-            query=LinkQuery(database_from='protein', database='gene', ids=[15718680, 157427902]),
-            uri='elink.fcgi?db=gene&dbfrom=protein&id=15718680,157427902&cmd=neighbor'
-        ),
-        Example(
-            name='Find articles related to PMID 20210808',
-            query=LinkQuery(database='pubmed', database_from='pubmed', ids=[20210808], command='neighbor_score'),
-            uri='elink.fcgi?db=pubmed&dbfrom=pubmed&id=20210808&cmd=neighbor_score'
-        ),
-        Example(
-            name='List all possible links from two protein GIs',
-            query=LinkQuery(database_from='protein', ids=[15718680, 157427902], command='acheck', database=None),
-            uri='elink.fcgi?dbfrom=protein&id=15718680,157427902&cmd=acheck'
-        ),
-        Example(
-            name='List all possible links from two protein GIs to PubMed',
-            query=LinkQuery(database_from='protein', ids=[15718680, 157427902], command='acheck', database='pubmed'),
-            uri='elink.fcgi?db=pubmed&dbfrom=protein&id=15718680,157427902&cmd=acheck'
-        )
-    ],
-    CitationQuery: [
-        Example(
-            name='Check PMIDs for two citations',
-            query=CitationQuery(
-                database='pubmed',
-                citations=[
-                    dict(
-                        journal='proc natl acad sci u s a',
-                        year=1991,
-                        volume=88,
-                        first_page=3248,
-                        author='mann bj',
-                        key='Art1'
-                    ),
-                    Citation(
-                        journal='science',
-                        year=1987,
-                        volume=235,
-                        first_page=182,
-                        author='palmenberg ac',
-                        key='Art2'
-                    )
-                ]
+@lru_cache(maxsize=None)
+def _examples() -> Dict[Type[EntrezQuery], List[Example]]:
+    return {
+        EPostQuery: [
+            Example(
+                name='Upload five Gene IDs to the Entrez History server',
+                query=EPostQuery(database='gene', ids=[7173, 22018, 54314, 403521, 525013]),
+                uri='epost.fcgi?db=gene&retmode=xml&id=7173,22018,54314,403521,525013'
+            )
+        ],
+        LinkQuery: [
+            Example(
+                name='Link from protein to gene',
+                query=LinkQuery(database_from='protein', database='gene', ids=[15718680, 157427902]),
+                uri='elink.fcgi?db=gene&dbfrom=protein&id=15718680,157427902&cmd=neighbor'
             ),
-            uri='ecitmatch.fcgi?db=pubmed&retmode=xml&bdata=proc+natl+acad+sci+u+s+a|1991|88|3248|mann+bj|Art1|%0Dscience|1987|235|182|palmenberg+ac|Art2|'
-        )
-    ],
-    SearchQuery: [
-        Example(
-            name='Find articles about human cancers',
-            query=SearchQuery(
-                term='cancer AND human[organism]',
-                database='pubmed',
-                max_results=10000
+            Example(
+                name='Find articles related to PMID 20210808',
+                query=LinkQuery(database='pubmed', database_from='pubmed', ids=[20210808], command='neighbor_score'),
+                uri='elink.fcgi?db=pubmed&dbfrom=pubmed&id=20210808&cmd=neighbor_score'
             ),
-            uri='esearch.fcgi?db=pubmed&retmax=10000&term=cancer AND human[organism]'
-        ),
-        Example(
-            name='Search PubMed Central for free full text articles containing the query stem cells',
-            query=SearchQuery(
-                term='stem cells AND free fulltext[filter]',
-                database='pmc',
-                max_results=10000
+            Example(
+                name='List all possible links from two protein GIs',
+                query=LinkQuery(database_from='protein', ids=[15718680, 157427902], command='acheck', database=None),
+                uri='elink.fcgi?dbfrom=protein&id=15718680,157427902&cmd=acheck'
+            ),
+            Example(
+                name='List all possible links from two protein GIs to PubMed',
+                query=LinkQuery(database_from='protein', ids=[15718680, 157427902], command='acheck', database='pubmed'),
+                uri='elink.fcgi?db=pubmed&dbfrom=protein&id=15718680,157427902&cmd=acheck'
+            )
+        ],
+        CitationQuery: [
+            Example(
+                name='Check PMIDs for two citations',
+                query=CitationQuery(
+                    database='pubmed',
+                    citations=[
+                        dict(
+                            journal='proc natl acad sci u s a',
+                            year=1991,
+                            volume=88,
+                            first_page=3248,
+                            author='mann bj',
+                            key='Art1'
+                        ),
+                        Citation(
+                            journal='science',
+                            year=1987,
+                            volume=235,
+                            first_page=182,
+                            author='palmenberg ac',
+                            key='Art2'
+                        )
+                    ]
+                ),
+                uri='ecitmatch.fcgi?db=pubmed&retmode=xml&bdata=proc+natl+acad+sci+u+s+a|1991|88|3248|mann+bj|Art1|%0Dscience|1987|235|182|palmenberg+ac|Art2|'
+            )
+        ],
+        SearchQuery: [
+            Example(
+                name='Find articles about human cancers',
+                query=SearchQuery(
+                    term='cancer AND human[organism]',
+                    database='pubmed',
+                    max_results=10000
+                ),
+                uri='esearch.fcgi?db=pubmed&retmax=10000&term=cancer AND human[organism]'
             ),
-            uri='esearch.fcgi?db=pmc&retmax=10000&term=stem cells AND free fulltext[filter]'
-        )
-    ]
-}
+            Example(
+                name='Search PubMed Central for free full text articles containing the query stem cells',
+                query=SearchQuery(
+                    term='stem cells AND free fulltext[filter]',
+                    database='pmc',
+                    max_results=10000
+                ),
+                uri='esearch.fcgi?db=pmc&retmax=10000&term=stem cells AND free fulltext[filter]'
+            )
+        ]
+    }
 
 
 def format_examples(examples, transformer=lambda x: x):
@@ -345,9 +429,64 @@ def format_examples(examples, transformer=lambda x: x):
     ])
 
 
-for query_, examples_ in EXAMPLES.items():
-    query_.__raw_doc__ = query_.__doc__
-    query_.__doc__ += format_examples(examples_)
+class _ExamplesDocstring:
+    """The docstring followed by the examples of the query, formatted on the first access."""
+
+    def __init__(self, doc: str, query: Type[EntrezQuery], method: Optional[str] = None):
+        self.doc = doc
+        self.query = query
+        # the name of the API method using the query, if documenting the method
+        self.method = method
+        self._formatted = None
+
+    def _transform(self, query: EntrezQuery) -> str:
+        if self.method is None:
+            return str(query)
+        return str(query).replace(self.query.__name__, 'entrez_api.' + self.method)
+
+    def __str__(self) -> str:
+        if self._formatted is None:
+            self._formatted = self.doc + format_examples(_examples()[self.query], transformer=self._transform)
+        return self._formatted
+
+    def __get__(self, instance, owner) -> str:
+        # used as the `__doc__` of the query class
+        return str(self)
+
+
+class _QueryMethod:
+    # the API method documented with the examples of its query (functions cannot have lazy docstrings)
+
+    def __init__(self, func, doc: _ExamplesDocstring):
+        self.__wrapped__ = func
+        self.__name__ = func.__name__
+        self.__qualname__ = func.__qualname__
+        self.__module__ = func.__module__
+        self._doc = doc
+
+    @property
+    def __doc__(self) -> str:
+        return str(self._doc)
+
+    def __call__(self, *args, **kwargs):
+        return self.__wrapped__(*args, **kwargs)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return MethodType(self, instance)
+
+
+# the examples are only created (and formatted) when the docstrings are read, e.g. by help() or Sphinx;
+# creating them validates the databases, which requires reading the table of databases
+for query_ in [EPostQuery, LinkQuery, CitationQuery, SearchQuery]:
+    query_.__doc__ = _ExamplesDocstring(query_.__doc__, query_)
+
+
+def __getattr__(name: str):
+    if name == 'EXAMPLES':
+        return _examples()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 def uses_query(query: Type[EntrezQuery]):
@@ -357,13 +496,10 @@ def uses_query(query: Type[EntrezQuery]):
         if not func.__doc__:
             func.__doc__ = ''
 
-        if hasattr(query, '__raw_doc__'):
-            func.__doc__ += query.__raw_doc__ + format_examples(
-                EXAMPLES[query],
-                transformer=lambda q: str(q).replace(query.__name__, 'entrez_api.' + func.__name__)
-            )
-        else:
-            func.__doc__ += query.__doc__
+        doc = query.__dict__['__doc__']
+        if isinstance(doc, _ExamplesDocstring):
+            return _QueryMethod(func, _ExamplesDocstring(func.__doc__ + doc.doc, query, method=func.__name__))
+        func.__doc__ += doc
 
         return func
 
@@ -0,0 +1,184 @@
+"""Rate limiters keeping the requests under the E-utilities request-rate cap."""
+import os
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from math import inf
+from pathlib import Path
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import Union
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+
+@dataclass
+class RateLimiterStatistics:
+    """Statistics of the time spent waiting for the rate limiter."""
+    #: Number of requests which passed through the limiter.
+    requests: int = 0
+    #: Number of requests which had to wait.
+    waited: int = 0
+    #: Total time spent waiting (seconds).
+    total_wait: float = 0
+    #: The longest single wait (seconds).
+    max_wait: float = 0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.requests if self.requests else 0
+
+    def record(self, wait: float):
+        self.requests += 1
+        if wait > 0:
+            self.waited += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+
+class RateLimiter(ABC):
+    """Base class for rate limiters.
+
+    The limiter is shared by reference between the batch-mode copies of the API object
+    and can be shared between threads and with other API objects using the same API key.
+    """
+
+    def __init__(self):
+        self.statistics = RateLimiterStatistics()
+        self._statistics_lock = Lock()
+
+    @abstractmethod
+    def _reserve(self) -> float:
+        """Reserve the next request slot returning the time (seconds) to wait for it."""
+
+    def reserve(self) -> float:
+        """Reserve the next request slot returning the time (seconds) to wait before sending the request.
+
+        Does not sleep on its own, which allows to wait without blocking (e.g. with :py:func:`asyncio.sleep`).
+        """
+        wait = self._reserve()
+        with self._statistics_lock:
+            self.statistics.record(wait)
+        return wait
+
+    def acquire(self) -> float:
+        """Block until the next request can be sent, returning the time spent waiting."""
+        wait = self.reserve()
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+
+class TokenBucket(RateLimiter):
+    """Thread-safe token bucket limiter.
+
+    Parameters:
+        rate: The number of requests allowed per second (the rate of refilling the bucket).
+        capacity: The maximal number of requests which can be sent in a burst
+            (default of 1 enforces a constant interval between the requests).
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        super().__init__()
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive, got {rate}')
+        if capacity < 1:
+            raise ValueError(f'Capacity must be at least 1, got {capacity}')
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens: float = capacity
+        self._updated = monotonic()
+        self._lock = Lock()
+
+    @classmethod
+    def from_interval(cls, minimal_interval: float, capacity: int = 1) -> 'TokenBucket':
+        """Create a bucket enforcing given minimal interval (seconds) between consecutive requests."""
+        return cls(rate=1 / minimal_interval if minimal_interval > 0 else inf, capacity=capacity)
+
+    def _reserve(self) -> float:
+        if self.rate == inf:
+            return 0
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # the balance may become negative, which reserves the slot for this request
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+    def __repr__(self):
+        return f'<TokenBucket rate={self.rate} capacity={self.capacity}>'
+
+
+@contextmanager
+def _locked_file(path: Path):
+    """Open (creating if needed) the file holding an exclusive lock for the duration of the context."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    with os.fdopen(fd, 'r+') as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            # locks the first byte, retrying for up to 10 seconds
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield f
+        finally:
+            f.flush()
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileTokenBucket(TokenBucket):
+    """Token bucket shared between processes on one host through a lock-protected state file.
+
+    All processes (and threads) creating the limiter with the same :py:obj:`path`
+    draw from a single budget, so that e.g. multiple workers using the same API key
+    together stay under the request rate allowed for that key.
+
+    Parameters:
+        path: The path of the file storing the state of the bucket; created if it does not exist.
+        rate: The number of requests allowed per second for all the processes together.
+        capacity: The maximal number of requests which can be sent in a burst.
+    """
+
+    def __init__(self, path: Union[str, Path], rate: float, capacity: int = 1):
+        super().__init__(rate=rate, capacity=capacity)
+        self.path = Path(path)
+
+    @classmethod
+    def from_interval(cls, path: Union[str, Path], minimal_interval: float, capacity: int = 1) -> 'FileTokenBucket':
+        """Create a bucket enforcing given minimal interval (seconds) between consecutive requests."""
+        return cls(path, rate=1 / minimal_interval if minimal_interval > 0 else inf, capacity=capacity)
+
+    def _reserve(self) -> float:
+        if self.rate == inf:
+            return 0
+        with self._lock, _locked_file(self.path) as f:
+            # wall clock time as monotonic clocks are not guaranteed to be comparable between processes
+            now = time()
+            state = f.read().split()
+            if len(state) == 2:
+                tokens, updated = float(state[0]), float(state[1])
+                tokens = min(self.capacity, tokens + max(0, now - updated) * self.rate)
+            else:
+                tokens = self.capacity
+            tokens -= 1
+            f.seek(0)
+            f.truncate()
+            f.write(f'{tokens!r} {now!r}')
+            if tokens >= 0:
+                return 0
+            return -tokens / self.rate
+
+    def __repr__(self):
+        return f'<FileTokenBucket path={str(self.path)!r} rate={self.rate} capacity={self.capacity}>'
@@ -0,0 +1,222 @@
+"""Splitting of EFetch and ESummary responses into per-UID records, and re-assembling them."""
+import json
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, TypeVar
+from xml.etree import ElementTree
+
+from .types import Identifier
+
+
+def canonical_id(identifier: Identifier, database: str) -> str:
+    """Convert identifier to the form in which the UIDs are returned by the server (e.g. ``'rs6311'`` → ``'6311'``)."""
+    identifier = str(identifier).strip()
+    if database == 'snp' and identifier[:2].lower() == 'rs':
+        return identifier[2:]
+    return identifier
+
+
+T = TypeVar('T')
+
+
+@dataclass
+class IdentifierMapping:
+    """Maps the identifiers given by the caller to the unique identifiers sent to the server, and back.
+
+    >>> mapping = IdentifierMapping.from_ids(['rs6311', 6311, 'rs6313'], database='snp')
+    >>> mapping.unique
+    ['6311', '6313']
+    >>> mapping.expand({'6311': 'A', '6313': 'B'})
+    ['A', 'A', 'B']
+    """
+    #: The identifiers as given, in the original order (including duplicates).
+    original: List[Identifier]
+    #: The canonical form of each of the original identifiers.
+    canonical: List[str]
+    #: The identifiers to send, without duplicates, in order of the first occurrence;
+    #: the identifiers which already are in the canonical form are kept as given.
+    unique: List[Identifier]
+
+    @classmethod
+    def from_ids(cls, ids: Sequence[Identifier], database: str) -> 'IdentifierMapping':
+        canonical = [canonical_id(identifier, database) for identifier in ids]
+        unique = {}
+        for identifier, key in zip(ids, canonical):
+            if key not in unique:
+                unique[key] = identifier if str(identifier) == key else key
+        return cls(original=list(ids), canonical=canonical, unique=list(unique.values()))
+
+    @property
+    def duplicates(self) -> int:
+        """The number of identifiers which were not sent as they duplicated the previous ones."""
+        return len(self.original) - len(self.unique)
+
+    def expand(self, by_uid: Mapping[str, T], default: Optional[T] = None) -> List[Optional[T]]:
+        """Fan out the results keyed by UID (as returned by the server) to the original identifiers."""
+        return [by_uid.get(key, default) for key in self.canonical]
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit('}', maxsplit=1)[-1]
+
+
+def _find_text(record: ElementTree.Element, *names: str) -> Optional[str]:
+    """Return the text of the first descendant (in document order) with one of the given local names."""
+    for element in record.iter():
+        if _local_name(element.tag) in names:
+            return element.text.strip() if element.text else None
+    return None
+
+
+# how to find the UID of an XML record; databases not listed use the `uid` attribute if present
+_UID_READERS: Dict[str, Callable[[ElementTree.Element], Optional[str]]] = {
+    'pubmed': lambda record: _find_text(record, 'PMID'),
+    'gene': lambda record: _find_text(record, 'Gene-track_geneid'),
+}
+
+
+def record_uid(record: ElementTree.Element, database: str) -> Optional[str]:
+    """Find the UID of the XML record (e.g. DocumentSummary, DocSum or PubmedArticle)."""
+    uid = record.get('uid')
+    if uid is not None:
+        return uid
+    reader = _UID_READERS.get(database)
+    if reader is not None:
+        return reader(record)
+    if _local_name(record.tag) == 'DocSum':
+        # ESummary in XML mode (version 1.0)
+        return _find_text(record, 'Id')
+    return None
+
+
+def split_records(content: bytes, content_type: str, database: str) -> Optional[Tuple[bytes, Dict[str, bytes]]]:
+    """Split the response body into the skeleton (the response without records) and the records by UID.
+
+    The entries reporting an error instead of the record (e.g. ESummary answering
+    ``{"uid": "1", "error": "cannot get document summary"}`` for an unknown UID) are left out,
+    so that they are not mistaken for the records.
+    Returns None if the UIDs of the records cannot be determined.
+    """
+    if content_type == 'json':
+        data = json.loads(content)
+        result = data.get('result')
+        if not isinstance(result, dict) or 'uids' not in result:
+            return None
+        records = {
+            uid: json.dumps(result[uid]).encode()
+            for uid in result['uids']
+            if uid in result and not (isinstance(result[uid], dict) and 'error' in result[uid])
+        }
+        skeleton = {**data, 'result': {'uids': []}}
+        return json.dumps(skeleton).encode(), records
+
+    root = ElementTree.fromstring(content)
+    records = {}
+    for record in root:
+        uid = record_uid(record, database)
+        if uid is None:
+            return None
+        if any(_local_name(child.tag) == 'error' for child in record):
+            continue
+        records[uid] = ElementTree.tostring(record)
+    skeleton = ElementTree.Element(root.tag, root.attrib)
+    return ElementTree.tostring(skeleton), records
+
+
+def assemble_records(skeleton: bytes, records: List[Tuple[str, bytes]], content_type: str) -> bytes:
+    """Re-create the response body from the skeleton and the `(uid, record)` pairs."""
+    if content_type == 'json':
+        data = json.loads(skeleton)
+        result = data['result']
+        for uid, record in records:
+            result['uids'].append(uid)
+            result[uid] = json.loads(record)
+        return json.dumps(data).encode()
+
+    root = ElementTree.fromstring(skeleton)
+    for uid, record in records:
+        root.append(ElementTree.fromstring(record))
+    return ElementTree.tostring(root)
+
+
+def iterparse_records(
+    body: BinaryIO, is_record: Callable[[ElementTree.Element, int], bool]
+) -> Iterator[Tuple[ElementTree.Element, ElementTree.Element]]:
+    """Parse the XML body incrementally, yielding `(root, record)` for the elements selected by `is_record`.
+
+    The predicate receives the element (with its tag and attributes, but not yet its children)
+    and its depth (the root being at depth 0); the elements nested in a record are not considered.
+    Each record is cleared and removed from its parent once the next one is requested, and so are
+    the elements outside of the records, so the memory use does not depend on the number of records
+    (extract or copy what you need before advancing the iterator).
+    The yielded `root` is an empty copy with the tag and attributes of the root element.
+    """
+    skeleton = None
+    # the elements from the root to the one being parsed
+    stack: List[ElementTree.Element] = []
+    record_depth = None
+    for event, element in ElementTree.iterparse(body, events=('start', 'end')):
+        if event == 'start':
+            if skeleton is None:
+                skeleton = ElementTree.Element(element.tag, element.attrib)
+            elif record_depth is None and is_record(element, len(stack)):
+                record_depth = len(stack)
+            stack.append(element)
+            continue
+        stack.pop()
+        depth = len(stack)
+        if depth == record_depth:
+            record_depth = None
+            yield skeleton, element
+            element.clear()
+        elif record_depth is not None:
+            # a part of the record being parsed
+            continue
+        if stack:
+            # drop the references to the processed records and to the elements around them
+            stack[-1].remove(element)
+
+
+def iter_child_records(body: BinaryIO) -> Iterator[Tuple[ElementTree.Element, ElementTree.Element]]:
+    """Parse the XML body incrementally, yielding `(root, record)` for each direct child of the root element.
+
+    See :py:func:`iterparse_records` for the memory use.
+    """
+    return iterparse_records(body, lambda element, depth: depth == 1)
+
+
+def _element_content(element: ElementTree.Element):
+    content = {f'@{_local_name(key)}': value for key, value in element.attrib.items()}
+    repeated = set()
+    for child in element:
+        key = _local_name(child.tag)
+        value = _element_content(child)
+        if key not in content:
+            content[key] = value
+            continue
+        if key not in repeated:
+            content[key] = [content[key]]
+            repeated.add(key)
+        content[key].append(value)
+    if any(child.tail and child.tail.strip() for child in element):
+        # mixed content (e.g. an abstract with <i> or <sup> markup): keep the whole text
+        text = ''.join(element.itertext()).strip()
+    else:
+        text = element.text.strip() if element.text else ''
+    if not content:
+        return text or None
+    if text:
+        content['#text'] = text
+    return content
+
+
+def element_to_dict(element: ElementTree.Element) -> dict:
+    """Convert the XML element (e.g. a record) to a JSON-compatible ``{tag: content}`` dictionary.
+
+    The namespaces are dropped from the tags and the attributes are stored under ``@``-prefixed keys.
+    The text is stored under ``#text``, or as the content itself for elements with neither
+    attributes nor children; the children repeating the same tag are collected into a list.
+
+    >>> element_to_dict(ElementTree.fromstring('<Author valid="Y"><LastName>Doe</LastName></Author>'))
+    {'Author': {'@valid': 'Y', 'LastName': 'Doe'}}
+    """
+    return {_local_name(element.tag): _element_content(element)}
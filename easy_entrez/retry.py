@@ -0,0 +1,92 @@
+"""Retry policies for the failed requests."""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from random import uniform
+from typing import FrozenSet, Optional
+
+from requests import Response
+
+
+@dataclass
+class Attempt:
+    """Timing and outcome of a single attempt of sending a request."""
+    #: The number of the attempt, starting from 1.
+    number: int
+    #: Time (seconds) it took to receive the response (or the error).
+    elapsed: float
+    #: The status code of the response; None if the request failed with an error.
+    status_code: Optional[int] = None
+    #: The error raised when sending the request, if any.
+    error: Optional[Exception] = None
+    #: Time (seconds) waited before the next attempt; zero for the last attempt.
+    delay: float = 0
+
+
+def _parse_retry_after(response: Response) -> Optional[float]:
+    """Read the `Retry-After` header which can be given either in seconds or as an HTTP date."""
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+    return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class RetryPolicy:
+    """Decides whether and when a failed request should be retried.
+
+    The delay grows exponentially with the number of attempts
+    (:py:obj:`backoff`, then :py:obj:`backoff` × :py:obj:`multiplier`, and so on,
+    up to :py:obj:`max_backoff`), and is randomised by the :py:obj:`jitter` fraction,
+    so that multiple workers do not retry in lockstep.
+    If the server provided a `Retry-After` header, it takes precedence over the computed delay.
+
+    Parameters:
+        max_attempts: The maximal number of attempts (including the first one); ``1`` disables retries.
+        backoff: The delay (seconds) before the first retry.
+        multiplier: The factor by which the delay grows with each retry.
+        max_backoff: The upper limit for the computed delay (seconds).
+        jitter: The fraction by which the delay is randomly increased or decreased.
+        retry_statuses: The status codes of responses which should be retried;
+            other statuses (e.g. 400 for a malformed query) are returned immediately.
+        retry_errors: Whether to retry connection errors and timeouts.
+        respect_retry_after: Whether to honour the `Retry-After` header.
+    """
+    max_attempts: int = 5
+    backoff: float = 1
+    multiplier: float = 2
+    max_backoff: float = 60
+    jitter: float = 0.25
+    retry_statuses: FrozenSet[int] = field(default_factory=lambda: frozenset({429, 500, 502, 503, 504}))
+    retry_errors: bool = True
+    respect_retry_after: bool = True
+
+    def should_retry(self, attempt: Attempt) -> bool:
+        if attempt.number >= self.max_attempts:
+            return False
+        if attempt.error is not None:
+            return self.retry_errors
+        return attempt.status_code in self.retry_statuses
+
+    def delay(self, attempt: Attempt, response: Optional[Response] = None) -> float:
+        """The time (seconds) to wait before the attempt following the given one."""
+        if response is not None and self.respect_retry_after:
+            retry_after = _parse_retry_after(response)
+            if retry_after is not None:
+                return retry_after
+        delay = min(self.max_backoff, self.backoff * self.multiplier ** (attempt.number - 1))
+        return delay * uniform(1 - self.jitter, 1 + self.jitter)
+
+
+#: Policy which never retries; the default for single calls.
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,128 @@
+"""HTTP transport used by :py:class:`~easy_entrez.api.EntrezAPI` to talk to the E-utilities server."""
+from shutil import copyfileobj
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+
+class Transport:
+    """A persistent HTTP session keeping a pool of keep-alive connections.
+
+    Reusing connections avoids a new TCP and TLS handshake on every E-utility call,
+    which dominates the cost of fetching many small batches.
+
+    Parameters:
+        pool_size: The maximal number of connections to keep alive per host;
+            increase it if you share a single API object between many threads.
+        compression: Whether to negotiate compressed (e.g. gzip) responses with the server.
+        session: A pre-configured :py:class:`requests.Session` to use instead of creating a new one
+            (e.g. with custom proxies or certificates); it is used as-is, without mounting the pool.
+    """
+
+    def __init__(self, pool_size: int = 10, compression: bool = True, session: Optional[Session] = None):
+        self.pool_size = pool_size
+        self.compression = compression
+        self.session = session if session is not None else self._create_session()
+
+    def _create_session(self) -> Session:
+        session = Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept-Encoding'] = DEFAULT_ACCEPT_ENCODING if self.compression else 'identity'
+        return session
+
+    def request(self, method: str, url: str, data: Dict[str, str], timeout: float, stream: bool = False) -> Response:
+        """Send the request; if `stream` is true, the body is not downloaded until it is read."""
+        if method == 'get':
+            return self.session.get(url, params=data, timeout=timeout, stream=stream)
+        if method == 'post':
+            return self.session.post(url, data=data, timeout=timeout, stream=stream)
+        raise ValueError(f'Incorrect query method: {method}')
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return f'<Transport pool_size={self.pool_size} compression={self.compression}>'
+
+
+def build_response(content: bytes, content_type: str, url: Optional[str] = None, status_code: int = 200) -> Response:
+    """Create a response object from previously stored content (e.g. restored from a checkpoint)."""
+    response = Response()
+    response._content = content
+    response.status_code = status_code
+    response.headers['Content-Type'] = content_type
+    response.url = url
+    return response
+
+
+def response_size(response: Response) -> Optional[int]:
+    """The size (bytes) of the (possibly not yet downloaded) body, if known.
+
+    This is the decompressed size if the body was already read; for a streamed response
+    it is the ``Content-Length``, i.e. the size as transferred (compressed, if the server used compression).
+    """
+    # requests uses False for the body which was not read yet
+    if response._content not in (False, None):
+        return len(response._content)
+    length = response.headers.get('Content-Length')
+    return int(length) if length is not None else None
+
+
+def transferred_size(response: Response) -> Optional[int]:
+    """The size (bytes) of the body as transferred (compressed, if the server used compression), if known.
+
+    This is the ``Content-Length`` or, for the body already read without it,
+    the number of bytes read from the connection; unknown for a streamed body without ``Content-Length``.
+    """
+    length = response.headers.get('Content-Length')
+    if length is not None:
+        return int(length)
+    if response._content not in (False, None) and response.raw is not None:
+        return response.raw.tell()
+    return None
+
+
+#: The size (bytes) up to which a spooled body is kept in memory before moving it to a temporary file.
+SPOOL_MEMORY_LIMIT = 8 * 1024 ** 2
+
+
+class _SpooledBody(SpooledTemporaryFile):
+
+    def stream(self, chunk_size: int, decode_content: bool = True) -> Iterator[bytes]:
+        # used by requests to read the raw body (e.g. for `Response.content`); always starts from the beginning
+        self.seek(0)
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def spool_body(response: Response, max_memory: Optional[int] = None, chunk_size: int = 64 * 1024) -> BinaryIO:
+    """Download the (decompressed) body of a streamed response in chunks into a temporary file.
+
+    At most `max_memory` bytes (by default :py:data:`SPOOL_MEMORY_LIMIT`) are held in memory,
+    larger bodies are rolled over to disk. The file replaces the raw stream of the response,
+    so the body can still be read in full (e.g. via :py:attr:`requests.Response.content`),
+    and the connection is returned to the pool.
+    """
+    raw = response.raw
+    body = _SpooledBody(max_size=max_memory if max_memory is not None else SPOOL_MEMORY_LIMIT)
+    raw.decode_content = True
+    copyfileobj(raw, body, chunk_size)
+    raw.release_conn()
+    body.seek(0)
+    response.raw = body
+    return body
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Dict, Union, List, TypeVar, Any
+from typing import Dict, Union, List, TypeVar, Any, Optional
 from typing_extensions import TypedDict, Literal
 try:
     from typing import get_args
@@ -15,7 +15,7 @@ except ImportError:
 
 from xml.etree import ElementTree
 
-from .data import entrez_databases
+from .data import entrez_database_rows
 
 
 # support minimal typing up to third level of nesting
@@ -74,17 +74,25 @@ def list_literal_values(type_annotation, modifier: lambda x: x):
     )
 
 
-class EntrezDatabaseType:
+class _ListingDatabases(type):
+    # the names of the databases are read from the table only when the docstring is accessed
+
+    @property
+    def __doc__(cls):
+        rows = entrez_database_rows()
+        return cls.__dict__['__doc__'] + list_literal_values(
+            _EntrezDatabaseType,
+            modifier=lambda arg: f':py:obj:`\'{arg}\'` - {rows[arg]["Entrez Database"]}'
+        )
+
+
+class EntrezDatabaseType(metaclass=_ListingDatabases):
     """The database to be used, one of:
     """
 
 
 EntrezDatabase = EntrezDatabaseType()
 EntrezDatabase.__supertype__ = _EntrezDatabaseType
-EntrezDatabaseType.__doc__ += list_literal_values(
-    _EntrezDatabaseType,
-    modifier=lambda arg: f':py:obj:`\'{arg}\'` - {entrez_databases["rows"][arg]["Entrez Database"]}'
-)
 
 _CommandType = Literal[
     'neighbor',
@@ -129,6 +137,17 @@ _IdentifierType = Union[str, int]
 Identifier = _IdentifierType
 
 
+@dataclass(frozen=True)
+class HistoryReference:
+    """A set of UIDs stored on the Entrez History server, e.g. by a search with ``use_history=True``."""
+    #: The Web environment (``WebEnv``) holding the set.
+    web_environment: str
+    #: The key of the set within the Web environment (``query_key``).
+    query_key: str
+    #: The number of UIDs in the set, if reported by the server.
+    count: Optional[int] = None
+
+
 @dataclass
 class Example:
     name: str
@@ -48,6 +48,7 @@ if __name__ == '__main__':
         extras_require={
             'with_progress_bars': ['tqdm'],
             'with_parsing_utils': ['pandas'],
+            'with_arrow': ['pandas', 'pyarrow'],
             'docs': [
                 'myst-parser',
                 'pydata-sphinx-theme',
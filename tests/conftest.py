@@ -0,0 +1,61 @@
+from http.server import ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from eutils_server import EutilsHandler
+
+
+ESEARCH_JSON = b'{"esearchresult": {"count": "2", "retmax": "2", "idlist": ["1", "2"]}}'
+
+
+class LocalServer(ThreadingHTTPServer):
+    """A stand-in for the E-utilities server, recording the requests it received."""
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), EutilsHandler)
+        self.requests = []
+        # endpoint name → queue of (status, content type, body, headers); the last one is repeated
+        self.responses = {}
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}/'
+
+    def respond(self, endpoint: str, body: bytes, content_type='application/json', status=200, headers=None):
+        self.responses.setdefault(endpoint, []).append((status, content_type, body, headers or {}))
+
+    def answer(self, handler: EutilsHandler, endpoint: str, params: dict):
+        self.requests.append({
+            'method': handler.command,
+            'endpoint': endpoint,
+            'params': params,
+            'headers': dict(handler.headers),
+            'client_port': handler.client_address[1]
+        })
+        queue = self.responses.get(endpoint, [(200, 'application/json', ESEARCH_JSON, {})])
+        return queue.pop(0) if len(queue) > 1 else queue[0]
+
+
+@pytest.fixture
+def local_server():
+    server = LocalServer()
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def create_api(local_server):
+    """Create an API (by default without the rate limiting) which sends the requests to the local server."""
+    from easy_entrez import EntrezAPI
+
+    def create(api_class=EntrezAPI, **kwargs):
+        kwargs.setdefault('minimal_interval', 0)
+        return api_class('easy-entrez-test', 'e@mail.com', server=local_server.url, **kwargs)
+
+    return create
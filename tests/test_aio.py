@@ -0,0 +1,77 @@
+import asyncio
+from time import monotonic
+
+import pytest
+
+from easy_entrez import AsyncEntrezAPI
+from easy_entrez.queries import SearchQuery
+from easy_entrez.api import is_response_for
+
+
+def test_search(create_api):
+
+    async def search():
+        async with create_api(AsyncEntrezAPI) as entrez_api:
+            return await entrez_api.search('cancer', max_results=2)
+
+    result = asyncio.run(search())
+    assert is_response_for(result, SearchQuery)
+    assert result.data['esearchresult']['idlist'] == ['1', '2']
+
+
+def test_rate_limit(local_server, create_api):
+
+    async def search_concurrently():
+        async with create_api(AsyncEntrezAPI, minimal_interval=0.1) as entrez_api:
+            start = monotonic()
+            await asyncio.gather(*[
+                entrez_api.search('cancer', max_results=2)
+                for _ in range(4)
+            ])
+            return monotonic() - start
+
+    assert asyncio.run(search_concurrently()) >= 0.3
+    assert len(local_server.requests) == 4
+
+
+def test_batch_mode(local_server, create_api):
+
+    async def fetch_in_batches():
+        async with create_api(AsyncEntrezAPI) as entrez_api:
+            return await entrez_api.in_batches_of(2, workers=2).fetch(['1', '2', '3', '4', '5'], max_results=2)
+
+    by_batch = asyncio.run(fetch_in_batches())
+    assert list(by_batch) == [('1', '2'), ('3', '4'), ('5',)]
+    assert sorted(request['params']['id'][0] for request in local_server.requests) == ['1,2', '3,4', '5']
+
+
+def test_search_all(local_server, create_api):
+    local_server.respond('esearch', b'{"esearchresult": {"count": "3", "idlist": ["1", "2"]}}')
+    local_server.respond('esearch', b'{"esearchresult": {"count": "3", "idlist": ["3"]}}')
+
+    async def search_all():
+        async with create_api(AsyncEntrezAPI) as entrez_api:
+            return [page async for page in entrez_api.search_all('cancer', page_size=2, workers=2)]
+
+    assert asyncio.run(search_all()) == [['1', '2'], ['3']]
+
+
+def test_export(local_server, tmp_path, create_api):
+    local_server.respond('efetch', b'<root><record uid="1"/><record uid="2"/></root>', content_type='text/xml')
+    local_server.respond('efetch', b'<root><record uid="3"/></root>', content_type='text/xml')
+
+    async def export():
+        async with create_api(AsyncEntrezAPI) as entrez_api:
+            return await entrez_api.in_batches_of(2, sleep_interval=0, workers=1).export_fetch(
+                ['1', '2', '3'], tmp_path / 'out.xml', database='snp'
+            )
+
+    manifest = asyncio.run(export())
+    assert manifest.records == 3
+    assert [request['params']['id'] for request in local_server.requests] == [['1,2'], ['3']]
+
+
+def test_unsupported_batch_options(create_api):
+    entrez_api = create_api(AsyncEntrezAPI)
+    with pytest.raises(ValueError, match='The stream option of the batch mode is not supported by the asynchronous API'):
+        entrez_api.in_batches_of(2, stream=True)
@@ -0,0 +1,103 @@
+from collections.abc import Iterator
+from itertools import islice
+from time import monotonic
+
+import pytest
+from requests import HTTPError
+from easy_entrez.batch import batches
+from easy_entrez.checkpoint import SQLiteCheckpointStore
+from easy_entrez.retry import RetryPolicy
+
+
+def test_batches():
+    assert batches([1, 2, 3, 4, 5], size=2) == [[1, 2], [3, 4], [5]]
+
+
+def test_concurrent_batches(create_api):
+    with create_api(minimal_interval=0.05) as entrez_api:
+        start = monotonic()
+        by_batch = entrez_api.in_batches_of(2, workers=3).fetch(list(range(1, 12)), max_results=2)
+        elapsed = monotonic() - start
+
+    assert list(by_batch) == [(1, 2), (3, 4), (5, 6), (7, 8), (9, 10), (11,)]
+    assert all(result.query.ids == list(batch) for batch, result in by_batch.items())
+    # no fixed between-batch sleep, but still throttled by the rate limiter
+    assert 5 * 0.05 * 0.9 <= elapsed < 3
+
+
+def test_failed_batch_is_retried(local_server, create_api):
+    local_server.respond('efetch', b'', status=500)
+    local_server.respond('efetch', b'<root/>', content_type='text/xml')
+    with create_api() as entrez_api:
+        with pytest.warns(UserWarning, match=r"Failed to fetch FetchQuery \['1', '2'\] in pubmed \(attempt 1 of 10\)"):
+            by_batch = entrez_api.in_batches_of(
+                2, sleep_interval=0, retry_policy=RetryPolicy(max_attempts=10, backoff=0)
+            ).fetch(['1', '2', '3'], max_results=2)
+    assert [result.response.status_code for result in by_batch.values()] == [200, 200]
+    assert len(local_server.requests) == 3
+
+
+def test_default_retry_backoff(create_api):
+    entrez_api = create_api()
+    assert entrez_api.in_batches_of(2).retry_policy.backoff == 6
+    # retrying without any delay would only add to the load of the struggling server
+    assert entrez_api.in_batches_of(2, sleep_interval=0).retry_policy.backoff == RetryPolicy.backoff
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_stream(workers, create_api):
+    with create_api() as entrez_api:
+        stream = entrez_api.in_batches_of(2, sleep_interval=0, workers=workers, stream=True).fetch(
+            ['1', '2', '3', '4', '5'], max_results=2
+        )
+        assert isinstance(stream, Iterator)
+        assert [batch for batch, response in stream] == [('1', '2'), ('3', '4'), ('5',)]
+
+
+def test_resume_from_checkpoint(local_server, tmp_path, create_api):
+    local_server.respond('efetch', b'<root><a/></root>', content_type='text/xml')
+    local_server.respond('efetch', b'<root><b/></root>', content_type='text/xml')
+    checkpoint = SQLiteCheckpointStore(tmp_path / 'jobs.sqlite', job_id='test')
+
+    with create_api() as entrez_api:
+        batch_mode = entrez_api.in_batches_of(2, sleep_interval=0, stream=True, checkpoint=checkpoint)
+        stream = batch_mode.fetch(['1', '2', '3', '4', '5'], max_results=2)
+        # the job dies after completing two batches
+        assert [batch for batch, result in islice(stream, 2)] == [('1', '2'), ('3', '4')]
+        stream.close()
+        assert len(checkpoint) == 2
+
+        local_server.responses['efetch'] = [(200, 'text/xml', b'<root><c/></root>', {})]
+        resumed = SQLiteCheckpointStore(tmp_path / 'jobs.sqlite', job_id='test')
+        by_batch = entrez_api.in_batches_of(2, sleep_interval=0, checkpoint=resumed).fetch(
+            ['1', '2', '3', '4', '5'], max_results=2
+        )
+
+    assert [result.data[0].tag for result in by_batch.values()] == ['a', 'b', 'c']
+    assert by_batch[('3', '4')].query.ids == ['3', '4']
+    assert len(local_server.requests) == 3
+    assert len(resumed) == 3
+
+
+def test_checkpoint_key_ignores_argument_passing(local_server, tmp_path, create_api):
+    local_server.respond('efetch', b'<root><a/></root>', content_type='text/xml')
+    with create_api() as entrez_api:
+        checkpoint = SQLiteCheckpointStore(tmp_path / 'jobs.sqlite', job_id='test')
+        entrez_api.in_batches_of(2, sleep_interval=0, checkpoint=checkpoint).fetch(['1', '2'], 2)
+
+        resumed = SQLiteCheckpointStore(tmp_path / 'jobs.sqlite', job_id='test')
+        by_batch = entrez_api.in_batches_of(2, sleep_interval=0, checkpoint=resumed).fetch(
+            ['1', '2'], max_results=2, database='pubmed'
+        )
+
+    assert by_batch[('1', '2')].data[0].tag == 'a'
+    assert len(local_server.requests) == 1
+
+
+def test_batch_failing_after_retries(local_server, create_api):
+    local_server.respond('efetch', b'', status=400)
+    with create_api() as entrez_api:
+        with pytest.raises(HTTPError, match=r'Failed to fetch 0-th batch after 1 attempt\(s\): status code != 200 \(= 400\)'):
+            entrez_api.in_batches_of(2, sleep_interval=0).fetch(['1', '2', '3'], max_results=2)
+    # 400 is not worth retrying
+    assert len(local_server.requests) == 1
@@ -0,0 +1,177 @@
+import json
+from time import sleep
+
+import pytest
+
+from easy_entrez.cache import SQLiteRecordCache, SQLiteResponseCache, cache_key
+from easy_entrez.transport import build_response
+
+
+def test_cache_key():
+    assert (
+        cache_key('esearch.fcgi', {'db': 'pubmed', 'term': 'cancer', 'tool': 'a', 'email': 'a@b.c', 'api_key': 'x'})
+        ==
+        cache_key('esearch.fcgi', {'term': 'cancer', 'db': 'pubmed', 'tool': 'b', 'email': 'd@e.f', 'api_key': None})
+    )
+    assert cache_key('esearch.fcgi', {'term': 'cancer'}) != cache_key('esummary.fcgi', {'term': 'cancer'})
+    assert cache_key('esearch.fcgi', {'term': 'cancer'}) != cache_key('esearch.fcgi', {'term': 'cancer', 'retmode': 'xml'})
+
+
+def test_hits_bypass_rate_limiter(local_server, tmp_path, create_api):
+    cache = SQLiteResponseCache(tmp_path / 'cache.sqlite')
+    with create_api(minimal_interval=1, cache=cache) as entrez_api:
+        first = entrez_api.search('cancer', max_results=2)
+        for _ in range(5):
+            cached = entrez_api.search('cancer', max_results=2)
+            assert cached.data == first.data
+            assert cached.content_type == 'json'
+
+    assert len(local_server.requests) == 1
+    assert entrez_api.rate_limiter.statistics.requests == 1
+    assert cache.statistics.hits == 5
+    assert cache.statistics.misses == 1
+    assert cache.statistics.hit_ratio == 5 / 6
+
+
+def test_failed_responses_are_not_cached(local_server, tmp_path, create_api):
+    local_server.respond('esearch', b'', status=500)
+    cache = SQLiteResponseCache(tmp_path / 'cache.sqlite')
+    with create_api(cache=cache) as entrez_api:
+        entrez_api.search('cancer', max_results=2)
+    assert len(cache) == 0
+
+
+def test_ttl(tmp_path):
+    cache = SQLiteResponseCache(tmp_path / 'cache.sqlite', ttl=0.05)
+    cache.set('a', build_response(b'{}', content_type='application/json'))
+    assert cache.get('a').content == b'{}'
+    sleep(0.06)
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_lru_eviction(tmp_path):
+    cache = SQLiteResponseCache(tmp_path / 'cache.sqlite', max_size=25)
+    for key in ['a', 'b']:
+        cache.set(key, build_response(b'x' * 10, content_type='text/xml'))
+        sleep(0.01)
+    # mark "a" as recently used
+    assert cache.get('a') is not None
+    cache.set('c', build_response(b'x' * 10, content_type='text/xml'))
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.get('c') is not None
+    assert cache.size == 20
+    assert cache.statistics.evictions == 1
+
+
+SNP_FETCH = (
+    b'<ns0:ExchangeSet xmlns:ns0="https://www.ncbi.nlm.nih.gov/SNP/docsum">'
+    b'%s'
+    b'</ns0:ExchangeSet>'
+)
+
+
+def snp_records(*uids):
+    return SNP_FETCH % b''.join(
+        b'<ns0:DocumentSummary uid="%s"><ns0:SNP_ID>%s</ns0:SNP_ID></ns0:DocumentSummary>' % (uid, uid)
+        for uid in uids
+    )
+
+
+def test_record_cache_fetches_only_missing_ids(local_server, tmp_path, create_api):
+    local_server.respond('efetch', snp_records(b'1', b'2'), content_type='text/xml')
+    local_server.respond('efetch', snp_records(b'3'), content_type='text/xml')
+    cache = SQLiteRecordCache(tmp_path / 'records.sqlite')
+    with create_api(record_cache=cache) as entrez_api:
+        first = entrez_api.fetch(['rs1', 'rs2'], max_results=10, database='snp')
+        assert [record.get('uid') for record in first.data] == ['1', '2']
+
+        second = entrez_api.fetch(['rs2', 'rs3', 'rs1'], max_results=10, database='snp')
+        assert local_server.requests[-1]['params']['id'] == ['3']
+        assert second.query.ids == ['rs2', 'rs3', 'rs1']
+        # in order of the requested identifiers
+        assert [record.get('uid') for record in second.data] == ['2', '3', '1']
+        assert [record.get('uid') for record in second.iter_records('DocumentSummary')] == ['2', '3', '1']
+
+        third = entrez_api.fetch(['rs3', 'rs1'], max_results=10, database='snp')
+        assert [record.get('uid') for record in third.data] == ['3', '1']
+
+    assert len(local_server.requests) == 2
+    assert cache.statistics.hits == 2 + 2
+    assert cache.statistics.misses == 2 + 1
+    assert cache.statistics.stores == 3
+
+
+def test_record_cache_summary_json(local_server, tmp_path, create_api):
+    def summary(*uids):
+        return json.dumps({
+            'header': {'type': 'esummary'},
+            'result': {'uids': list(uids), **{uid: {'uid': uid, 'title': f'Article {uid}'} for uid in uids}}
+        }).encode()
+
+    local_server.respond('esummary', summary('10', '20'))
+    local_server.respond('esummary', summary('30'))
+    cache = SQLiteRecordCache(tmp_path / 'records.sqlite')
+    with create_api(record_cache=cache) as entrez_api:
+        entrez_api.summarize(['10', '20'], max_results=10)
+        result = entrez_api.summarize(['30', '10'], max_results=10)
+        # cached records are scoped by database (the local server has no record for gene 10)
+        with pytest.warns(UserWarning, match='did not return the records'):
+            entrez_api.summarize(['10'], max_results=10, database='gene')
+
+    assert result.data == {
+        'header': {'type': 'esummary'},
+        'result': {
+            'uids': ['30', '10'],
+            '30': {'uid': '30', 'title': 'Article 30'},
+            '10': {'uid': '10', 'title': 'Article 10'}
+        }
+    }
+    assert [request['params']['id'] for request in local_server.requests] == [['10,20'], ['30'], ['10']]
+
+
+def test_record_cache_skips_missing_records(local_server, tmp_path, create_api):
+    def summary(found, errors):
+        return json.dumps({
+            'header': {'type': 'esummary'},
+            'result': {
+                'uids': found + errors,
+                **{uid: {'uid': uid, 'title': f'Article {uid}'} for uid in found},
+                **{uid: {'uid': uid, 'error': 'cannot get document summary'} for uid in errors}
+            }
+        }).encode()
+
+    local_server.respond('esummary', summary(['10'], ['99']))
+    local_server.respond('esummary', summary([], ['99']))
+    local_server.respond('efetch', snp_records(b'1'), content_type='text/xml')
+    cache = SQLiteRecordCache(tmp_path / 'records.sqlite')
+    with create_api(record_cache=cache) as entrez_api:
+        with pytest.warns(UserWarning, match=r'did not return the records for 1 UID\(s\) in pubmed .*: 99'):
+            entrez_api.summarize(['10', '99'], max_results=10)
+        with pytest.warns(UserWarning, match=r'did not return the records for 1 UID\(s\) in pubmed .*: 99'):
+            result = entrez_api.summarize(['10', '99'], max_results=10)
+        with pytest.warns(UserWarning, match=r'did not return the records for 1 UID\(s\) in snp .*: 2'):
+            entrez_api.fetch(['1', '2'], max_results=10, database='snp')
+
+    # the error was not cached, but requested again
+    assert [request['params']['id'] for request in local_server.requests] == [['10,99'], ['99'], ['1,2']]
+    assert result.data['result']['uids'] == ['10']
+
+
+def test_record_cache_does_not_store_failures(local_server, tmp_path, create_api):
+    local_server.respond('efetch', b'', content_type='text/xml', status=400)
+    cache = SQLiteRecordCache(tmp_path / 'records.sqlite')
+    with create_api(record_cache=cache) as entrez_api:
+        result = entrez_api.fetch(['1'], max_results=10, database='snp')
+    assert result.response.status_code == 400
+    assert len(cache) == 0
+
+
+def test_record_cache_passes_through_plain_text(local_server, tmp_path, create_api):
+    local_server.respond('efetch', b'>1\nACGT\n', content_type='text/plain')
+    cache = SQLiteRecordCache(tmp_path / 'records.sqlite')
+    with create_api(record_cache=cache) as entrez_api:
+        result = entrez_api.fetch(['1'], max_results=10, database='nuccore')
+    assert result.response.content == b'>1\nACGT\n'
+    assert len(cache) == 0
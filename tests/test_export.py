@@ -0,0 +1,105 @@
+import gzip
+import json
+from xml.etree import ElementTree
+
+import pytest
+from easy_entrez.export import ExportManifest, manifest_path
+
+
+def records_xml(*uids):
+    records = ''.join(
+        f'<ns0:DocumentSummary uid="{uid}"><ns0:SNP_ID>{uid}</ns0:SNP_ID></ns0:DocumentSummary>'
+        for uid in uids
+    )
+    return (
+        '<?xml version="1.0" ?>\n'
+        '<ns0:ExchangeSet xmlns:ns0="https://www.ncbi.nlm.nih.gov/SNP/docsum">' + records + '</ns0:ExchangeSet>'
+    ).encode()
+
+
+def test_export_xml(local_server, tmp_path, create_api):
+    local_server.respond('efetch', records_xml('1', '2'), content_type='text/xml')
+    local_server.respond('efetch', records_xml('3'), content_type='text/xml')
+    path = tmp_path / 'variants.xml.gz'
+
+    with create_api() as entrez_api:
+        manifest = entrez_api.in_batches_of(2, sleep_interval=0).export_fetch(
+            ['rs1', 'rs2', 'rs3'], path, database='snp', compress='gzip'
+        )
+
+    content = gzip.decompress(path.read_bytes())
+    assert b'<ns0:DocumentSummary uid="3"><ns0:SNP_ID>3</ns0:SNP_ID></ns0:DocumentSummary>' in content
+    root = ElementTree.fromstring(content)
+    assert root.tag == '{https://www.ncbi.nlm.nih.gov/SNP/docsum}ExchangeSet'
+    assert [record.get('uid') for record in root] == ['1', '2', '3']
+    assert manifest.records == 3
+    assert [(batch.ids, batch.records) for batch in manifest.batches] == [(2, 2), (1, 1)]
+    assert ExportManifest.load(manifest_path(path)) == manifest
+    assert not (tmp_path / 'variants.xml.gz.partial').exists()
+    assert local_server.requests[0]['params']['retmax'] == ['2']
+
+
+def test_export_xml_is_not_reserialized(local_server, tmp_path, create_api):
+    prologue = (
+        b'<?xml version="1.0" ?>\n'
+        b'<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2024//EN"'
+        b' "https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_240101.dtd">\n'
+        b'<PubmedArticleSet>'
+    )
+    articles = [
+        b'\n<PubmedArticle><MedlineCitation Status="MEDLINE"><PMID Version="1">%s</PMID></MedlineCitation></PubmedArticle>\n'
+        % pmid
+        for pmid in [b'1', b'2']
+    ]
+    for article in articles:
+        local_server.respond('efetch', prologue + article + b'</PubmedArticleSet>', content_type='text/xml')
+    local_server.respond('efetch', prologue.replace(b'<PubmedArticleSet>', b'<PubmedArticleSet/>'), content_type='text/xml')
+    path = tmp_path / 'articles.xml'
+
+    with create_api() as entrez_api:
+        manifest = entrez_api.in_batches_of(1, sleep_interval=0).export_fetch(['1', '2', '3'], path)
+
+    assert path.read_bytes() == prologue + b''.join(articles) + b'</PubmedArticleSet>\n'
+    assert [batch.records for batch in manifest.batches] == [1, 1, 0]
+
+
+def test_export_jsonl(local_server, tmp_path, create_api):
+    articles = b''.join(
+        b'<PubmedArticle><MedlineCitation><PMID>%s</PMID></MedlineCitation></PubmedArticle>' % pmid
+        for pmid in [b'1', b'2']
+    )
+    local_server.respond('efetch', b'<PubmedArticleSet>' + articles + b'</PubmedArticleSet>', content_type='text/xml')
+    path = tmp_path / 'records.jsonl'
+
+    with create_api() as entrez_api:
+        manifest = entrez_api.export_fetch(['1', '2'], path, database='pubmed', format='jsonl')
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert lines == [
+        {'PubmedArticle': {'MedlineCitation': {'PMID': '1'}}},
+        {'PubmedArticle': {'MedlineCitation': {'PMID': '2'}}}
+    ]
+    assert manifest.records == 2
+    # EFetch does not support JSON for pubmed, so the records are always fetched as XML
+    assert local_server.requests[0]['params']['retmode'] == ['xml']
+
+
+def test_export_mismatched_roots(local_server, tmp_path, create_api):
+    local_server.respond('efetch', records_xml('1'), content_type='text/xml')
+    local_server.respond('efetch', b'<other><record/></other>', content_type='text/xml')
+    path = tmp_path / 'variants.xml'
+
+    with create_api() as entrez_api:
+        with pytest.raises(ValueError, match='Cannot merge the XML responses with different root elements'):
+            entrez_api.in_batches_of(1, sleep_interval=0).export_fetch(['1', '2'], path, database='snp')
+    assert not path.exists()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_export_options(local_server, tmp_path, create_api):
+    with create_api() as entrez_api:
+        with pytest.raises(ValueError, match='Unsupported export format: csv'):
+            entrez_api.export_fetch(['1'], tmp_path / 'out', format='csv')
+        with pytest.raises(ValueError, match='Unsupported compression: zip'):
+            entrez_api.export_fetch(['1'], tmp_path / 'out', compress='zip')
+    assert local_server.requests == []
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from easy_entrez import EntrezAPI
+from easy_entrez.types import HistoryReference
+
+
+ESEARCH_HISTORY_JSON = json.dumps({
+    'esearchresult': {
+        'count': '25000', 'retmax': '0', 'retstart': '0', 'idlist': [],
+        'querykey': '1', 'webenv': 'MCID_123'
+    }
+}).encode()
+
+EPOST_XML = b"""\
+<?xml version="1.0" encoding="UTF-8" ?>
+<ePostResult>
+    <QueryKey>2</QueryKey>
+    <WebEnv>MCID_123</WebEnv>
+</ePostResult>
+"""
+
+
+def test_search_to_fetch_pipeline(local_server, create_api):
+    local_server.respond('esearch', ESEARCH_HISTORY_JSON)
+    local_server.respond('efetch', b'<PubmedArticleSet/>', content_type='text/xml')
+    with create_api() as entrez_api:
+        search = entrez_api.search('cancer', max_results=0, use_history=True)
+        history = search.history
+        assert history == HistoryReference(web_environment='MCID_123', query_key='1', count=25000)
+
+        for start in range(0, 1000, 500):
+            entrez_api.fetch(history=history, start=start, max_results=500)
+        # batch mode does not apply to the sets on the History server
+        entrez_api.in_batches_of(100).fetch(history=history, max_results=500)
+
+    search_request, *fetch_requests = local_server.requests
+    assert search_request['params']['usehistory'] == ['y']
+    assert [request['params'].get('retstart') for request in fetch_requests] == [None, ['500'], None]
+    for request in fetch_requests:
+        assert request['params']['WebEnv'] == ['MCID_123']
+        assert request['params']['query_key'] == ['1']
+        assert 'id' not in request['params']
+
+
+def test_post(local_server, create_api):
+    local_server.respond('epost', EPOST_XML, content_type='text/xml')
+    with create_api() as entrez_api:
+        result = entrez_api.post(['1', '2'], web_environment='MCID_123')
+        assert result.history == HistoryReference(web_environment='MCID_123', query_key='2')
+        entrez_api.link(database='pubmed', database_from='pubmed', history=result.history)
+
+    post_request, link_request = local_server.requests
+    assert post_request['method'] == 'POST'
+    assert post_request['params']['id'] == ['1,2']
+    assert post_request['params']['WebEnv'] == ['MCID_123']
+    assert link_request['params']['query_key'] == ['2']
+
+
+def test_ids_or_history_required():
+    entrez_api = EntrezAPI('test', 'e@mail.com')
+    with pytest.raises(ValueError, match='Either ids or history'):
+        entrez_api.fetch(max_results=10)
+
+
+def test_response_without_history(create_api):
+    with create_api() as entrez_api:
+        result = entrez_api.search('cancer', max_results=2)
+        with pytest.raises(ValueError, match='does not refer to the History server'):
+            result.history
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+from textwrap import dedent
+
+
+def run_python(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, '-c', dedent(code)], check=True, capture_output=True, text=True
+    ).stdout
+
+
+def test_import_is_lazy():
+    output = run_python("""
+        import sys
+        import easy_entrez
+        from easy_entrez import data, queries
+        print(
+            data.entrez_database_rows.cache_info().currsize,
+            queries._examples.cache_info().currsize,
+            'asyncio' in sys.modules
+        )
+    """)
+    assert output.split() == ['0', '0', 'False']
+
+
+def test_modules_imported():
+    # measured in a fresh interpreter, excluding the dependencies
+    output = run_python("""
+        import sys
+        import requests
+        before = set(sys.modules)
+        import easy_entrez
+        print(' '.join(set(sys.modules) - before))
+    """)
+    imported = set(output.split())
+    assert 'easy_entrez.api' in imported
+    heavy = {'asyncio', 'numpy', 'pandas', 'pyarrow', 'easy_entrez.aio', 'easy_entrez.parsing'}
+    assert imported & heavy == set()
+
+
+def test_docstrings_on_demand():
+    output = run_python("""
+        from easy_entrez import EntrezAPI, queries
+        from easy_entrez.queries import LinkQuery
+        from easy_entrez.types import EntrezDatabaseType
+        created_on_import = queries._examples.cache_info().currsize
+        print(created_on_import, 'Examples:' in LinkQuery.__doc__, '>>> entrez_api.link(' in EntrezAPI.link.__doc__)
+        print(":py:obj:`'pubmed'` - PubMed" in EntrezDatabaseType.__doc__)
+    """)
+    assert output.split() == ['0', 'True', 'True', 'True']
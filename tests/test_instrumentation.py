@@ -0,0 +1,89 @@
+import gzip
+
+import pytest
+
+from easy_entrez.instrumentation import Histogram, Metrics, RequestHooks
+from easy_entrez.retry import RetryPolicy
+
+
+class RecordingHooks(RequestHooks):
+
+    def __init__(self):
+        self.events = []
+
+    def before_send(self, query, url, data, attempt_number):
+        self.events.append(('before_send', attempt_number))
+
+    def after_response(self, query, attempt, response):
+        self.events.append(('after_response', attempt.status_code))
+
+    def on_retry(self, query, attempt, delay):
+        self.events.append(('on_retry', attempt.number))
+
+    def on_rate_limit_wait(self, query, wait):
+        self.events.append(('on_rate_limit_wait', wait > 0))
+
+    def on_parse(self, query, elapsed):
+        self.events.append(('on_parse', query.endpoint))
+
+
+def test_histogram():
+    histogram = Histogram(buckets=(1, 10, float('inf')))
+    for value in [0.5, 1, 5, 100]:
+        histogram.observe(value)
+    assert histogram.cumulative() == [(1, 2), (10, 3), (float('inf'), 4)]
+    assert histogram.sum == 106.5
+    assert histogram.count == 4
+
+
+def test_hooks(local_server, create_api):
+    local_server.respond('esearch', b'', status=503)
+    local_server.respond('esearch', b'{"esearchresult": {"idlist": []}}')
+    hooks = RecordingHooks()
+    retry_policy = RetryPolicy(backoff=0)
+    with create_api(minimal_interval=0.05, retry_policy=retry_policy, hooks=[hooks]) as entrez_api:
+        with pytest.warns(UserWarning, match='Failed to fetch'):
+            result = entrez_api.search('cancer', max_results=1)
+        result.data
+        result.data
+
+    assert hooks.events == [
+        ('before_send', 1),
+        ('after_response', 503),
+        ('on_retry', 1),
+        ('on_rate_limit_wait', True),
+        ('before_send', 2),
+        ('after_response', 200),
+        ('on_parse', 'esearch'),
+    ]
+
+
+def test_metrics(local_server, create_api):
+    body = b'<root>' + b'<a/>' * 1000 + b'</root>'
+    for _ in range(3):
+        local_server.respond('efetch', body, content_type='text/xml')
+    metrics = Metrics()
+    with create_api(minimal_interval=0.05, hooks=[metrics]) as entrez_api:
+        for batch in entrez_api.in_batches_of(1, sleep_interval=0).fetch(['1', '2'], max_results=1).values():
+            batch.data
+        # the size of a streamed body is known before it is read
+        entrez_api.fetch(['3'], max_results=1, stream=True).data
+        entrez_api.search('cancer', max_results=1)
+
+    snapshot = metrics.snapshot()
+    assert list(snapshot) == ['efetch', 'esearch']
+    efetch = snapshot['efetch']
+    assert efetch['wall_time']['count'] == 3
+    # measured as transferred, i.e. compressed by the local server
+    assert efetch['response_size']['sum'] == 3 * len(gzip.compress(body, compresslevel=1))
+    assert efetch['response_size']['buckets']['1024.0'] == 3
+    assert efetch['parse_time']['count'] == 3
+    assert efetch['sleep_time']['count'] >= 1
+    assert efetch['responses'] == {'200': 3}
+    assert 'parse_time' not in snapshot['esearch']
+
+    text = metrics.to_prometheus()
+    assert '# TYPE easy_entrez_wall_time_seconds histogram' in text
+    assert 'easy_entrez_wall_time_seconds_bucket{endpoint="efetch",le="+Inf"} 3' in text
+    assert 'easy_entrez_wall_time_seconds_count{endpoint="esearch"} 1' in text
+    assert 'easy_entrez_responses_total{endpoint="efetch",outcome="200"} 3' in text
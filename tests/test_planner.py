@@ -0,0 +1,77 @@
+import pytest
+
+from easy_entrez import EntrezAPI
+from easy_entrez.planner import BatchPlanner
+from easy_entrez.retry import Attempt, RetryPolicy
+from easy_entrez.transport import build_response
+
+
+KEY = ('fetch', 'snp')
+
+
+def test_grows_while_under_targets():
+    planner = BatchPlanner(target_latency=1, target_bytes=1000, max_size=300)
+    planner.record(KEY, 100, [Attempt(number=1, elapsed=0.1, status_code=200)], build_response(b'x' * 10, 'text/xml'))
+    assert planner.size_for(KEY, default=100) == 200
+    planner.record(KEY, 200, [Attempt(number=1, elapsed=0.1, status_code=200)], build_response(b'x' * 10, 'text/xml'))
+    assert planner.size_for(KEY, default=100) == 300
+    # other databases are tuned separately
+    assert planner.size_for(('fetch', 'pubmed'), default=100) == 100
+
+
+def test_shrinks_over_targets():
+    planner = BatchPlanner(target_latency=1, target_bytes=1000)
+    planner.record(KEY, 100, [Attempt(number=1, elapsed=0.1, status_code=200)], build_response(b'x' * 4000, 'text/xml'))
+    assert planner.size_for(KEY, default=100) == 25
+    planner.record(KEY, 100, [Attempt(number=1, elapsed=2, status_code=200)], build_response(b'', 'text/xml'))
+    assert planner.size_for(KEY, default=100) == 50
+
+
+def test_shrinks_on_failures():
+    planner = BatchPlanner(min_size=20)
+    attempts = [Attempt(number=1, elapsed=10, status_code=503), Attempt(number=2, elapsed=0.1, status_code=200)]
+    planner.record(KEY, 100, attempts, build_response(b'', 'text/xml'))
+    assert planner.size_for(KEY, default=100) == 50
+    planner.record(KEY, 30, attempts=[])
+    assert planner.size_for(KEY, default=100) == 20
+
+
+def test_adaptive_batches(create_api):
+    planner = BatchPlanner(min_size=1, growth=2)
+    with create_api() as entrez_api:
+        by_batch = entrez_api.in_batches_of(1, sleep_interval=0, planner=planner).fetch(
+            list(range(1, 12)), max_results=10, database='snp'
+        )
+    assert list(by_batch) == [(1,), (2, 3), (4, 5, 6, 7), (8, 9, 10, 11)]
+    assert planner.sizes[('fetch', 'snp')] == 8
+
+
+def test_adaptive_batches_shrink_after_server_errors(local_server, create_api):
+    local_server.respond('efetch', b'', status=503)
+    local_server.respond('efetch', b'<root/>', content_type='text/xml')
+    planner = BatchPlanner(min_size=1)
+    retry_policy = RetryPolicy(backoff=0)
+    with create_api() as entrez_api:
+        with pytest.warns(UserWarning, match='Failed to fetch'):
+            by_batch = entrez_api.in_batches_of(4, sleep_interval=0, planner=planner, retry_policy=retry_policy).fetch(
+                list(range(1, 8)), max_results=10
+            )
+    # the failed batch is re-split rather than retried as a whole
+    assert list(by_batch) == [(1, 2), (3, 4), (5, 6, 7)]
+    assert [request['params']['id'][0] for request in local_server.requests] == ['1,2,3,4', '1,2', '3,4', '5,6,7']
+
+
+def test_adaptive_batches_do_not_exceed_max_results(create_api):
+    planner = BatchPlanner(min_size=1, growth=4)
+    with create_api() as entrez_api:
+        by_batch = entrez_api.in_batches_of(2, sleep_interval=0, planner=planner).fetch(
+            list(range(1, 10)), max_results=3, database='snp'
+        )
+    assert [len(batch) for batch in by_batch] == [2, 3, 3, 1]
+
+
+def test_planner_cannot_be_used_with_checkpoint(tmp_path):
+    from easy_entrez.checkpoint import SQLiteCheckpointStore
+    entrez_api = EntrezAPI('test', 'e@mail.com')
+    with pytest.raises(ValueError, match='cannot be used with checkpoints'):
+        entrez_api.in_batches_of(planner=BatchPlanner(), checkpoint=SQLiteCheckpointStore(tmp_path / 'a', 'job'))
@@ -6,7 +6,7 @@ import pytest
 import easy_entrez.data
 from easy_entrez import queries
 from easy_entrez.queries import EXAMPLES
-from easy_entrez.types import Example
+from easy_entrez.types import Example, HistoryReference
 
 
 def test_codes():
@@ -14,6 +14,28 @@ def test_codes():
     assert 'pubmed' in easy_entrez.data.entrez_database_codes
 
 
+@pytest.mark.parametrize('example', [example for examples in EXAMPLES.values() for example in examples])
+def test_examples_are_valid(example: Example, recwarn):
+    example.query.validate()
+    assert len(recwarn) == 0
+
+
+def test_custom_query_without_docstring():
+    from dataclasses import dataclass
+
+    @dataclass
+    class CustomQuery(queries.EntrezQuery):
+        endpoint = 'ecustom'
+
+    assert CustomQuery(database='pubmed').endpoint_uri == 'ecustom.fcgi'
+
+
+def test_method_docstrings_include_examples():
+    from easy_entrez import EntrezAPI
+    assert '>>> entrez_api.link(' in EntrezAPI.link.__doc__
+    assert '>>> entrez_api.search(' in EntrezAPI.search.__doc__
+
+
 @pytest.mark.parametrize('example', EXAMPLES[queries.LinkQuery])
 def test_link_query(example: Example):
     assert example.query.full_uri() == example.uri
@@ -27,3 +49,17 @@ def test_search_query(example: Example):
 @pytest.mark.parametrize('example', EXAMPLES[queries.CitationQuery])
 def test_citation_query(example: Example):
     assert example.query.full_uri() == example.uri
+
+
+@pytest.mark.parametrize('example', EXAMPLES[queries.EPostQuery])
+def test_epost_query(example: Example):
+    assert example.query.full_uri() == example.uri
+
+
+def test_history_parameters():
+    history = HistoryReference(web_environment='MCID_1', query_key='2')
+    query = queries.FetchQuery(database='pubmed', ids=[], max_results=500, history=history, start=1000)
+    assert query.full_uri() == 'efetch.fcgi?db=pubmed&retmax=500&WebEnv=MCID_1&query_key=2&retstart=1000&retmode=xml'
+
+    query = queries.SearchQuery(database='pubmed', term='cancer', max_results=0, use_history=True)
+    assert query.full_uri() == 'esearch.fcgi?db=pubmed&retmax=0&term=cancer&usehistory=y'
@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import chain
+from time import monotonic, time
+
+from pytest import raises, warns
+from easy_entrez import EntrezAPI
+from easy_entrez.rate_limit import TokenBucket, FileTokenBucket
+
+
+def test_interval_between_threads():
+    limiter = TokenBucket(rate=20)
+    start = monotonic()
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        list(executor.map(lambda _: limiter.acquire(), range(5)))
+    assert monotonic() - start >= 4 / 20 * 0.95
+    statistics = limiter.statistics
+    assert statistics.requests == 5
+    assert statistics.waited == 4
+    assert statistics.max_wait >= 0.15
+    assert statistics.mean_wait > 0
+
+
+def test_burst_capacity():
+    limiter = TokenBucket(rate=1, capacity=3)
+    assert [limiter.reserve() for _ in range(3)] == [0, 0, 0]
+    assert limiter.reserve() > 0.9
+
+
+def test_from_interval():
+    assert TokenBucket.from_interval(0.5).rate == 2
+    limiter = TokenBucket.from_interval(0)
+    assert [limiter.reserve() for _ in range(10)] == [0] * 10
+    with raises(ValueError, match='Rate must be positive'):
+        TokenBucket(rate=0)
+
+
+def test_limiter_derived_from_api_key():
+    assert EntrezAPI('test', 'e@mail.com').rate_limiter.rate < 3
+    assert 9 < EntrezAPI('test', 'e@mail.com', api_key='key').rate_limiter.rate < 10
+    assert EntrezAPI('test', 'e@mail.com', minimal_interval=1).rate_limiter.rate == 1
+
+
+def test_minimal_interval_can_be_changed():
+    entrez_api = EntrezAPI('test', 'e@mail.com')
+    entrez_api.minimal_interval = 2
+    assert entrez_api.rate_limiter.rate == 0.5
+    assert entrez_api.in_batches_of(10).rate_limiter.rate == 0.5
+
+    limiter = TokenBucket(rate=5)
+    entrez_api = EntrezAPI('test', 'e@mail.com', rate_limiter=limiter)
+    with warns(UserWarning, match='The minimal interval has no effect on the custom rate limiter'):
+        entrez_api.minimal_interval = 2
+    assert entrez_api.rate_limiter is limiter
+
+
+def test_shared_by_batch_mode():
+    entrez_api = EntrezAPI('test', 'e@mail.com')
+    assert entrez_api.in_batches_of(10).rate_limiter is entrez_api.rate_limiter
+
+
+def acquire_in_process(path, n):
+    limiter = FileTokenBucket(path, rate=20)
+    times = []
+    for _ in range(n):
+        limiter.acquire()
+        times.append(time())
+    return times
+
+
+def test_file_bucket_shared_between_instances(tmp_path):
+    path = tmp_path / 'limiter.state'
+    first = FileTokenBucket(path, rate=1)
+    second = FileTokenBucket(path, rate=1)
+    assert first.reserve() == 0
+    assert second.reserve() > 0.9
+    assert path.exists()
+
+
+def test_file_bucket_shared_between_processes(tmp_path):
+    path = str(tmp_path / 'limiter.state')
+    with ProcessPoolExecutor(max_workers=3) as executor:
+        times = sorted(chain.from_iterable(executor.map(acquire_in_process, [path] * 3, [3] * 3)))
+    gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+    assert len(times) == 9
+    # allow for a little jitter of the process scheduling
+    assert min(gaps) >= 1 / 20 * 0.8
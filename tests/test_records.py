@@ -0,0 +1,80 @@
+from xml.etree import ElementTree
+
+from easy_entrez.records import IdentifierMapping, assemble_records, canonical_id, element_to_dict, split_records
+
+
+def test_canonical_id():
+    assert canonical_id('rs6311', 'snp') == '6311'
+    assert canonical_id(' RS6311 ', 'snp') == '6311'
+    assert canonical_id(6311, 'snp') == '6311'
+    assert canonical_id('rs6311', 'pubmed') == 'rs6311'
+
+
+def test_identifier_mapping():
+    mapping = IdentifierMapping.from_ids(['rs6311', 6311, 'rs6313', 7, 'rs6313'], database='snp')
+    assert mapping.unique == ['6311', '6313', 7]
+    assert mapping.duplicates == 2
+    assert mapping.expand({'6311': 'a', '7': 'b'}) == ['a', 'a', None, 'b', None]
+
+
+def test_split_and_assemble_xml():
+    content = b'<Set><Record uid="1"><a/></Record><Record uid="2"><b/></Record></Set>'
+    skeleton, records = split_records(content, 'xml', database='snp')
+    assert list(records) == ['1', '2']
+    assert assemble_records(skeleton, [('2', records['2']), ('1', records['1'])], 'xml') == (
+        b'<Set><Record uid="2"><b /></Record><Record uid="1"><a /></Record></Set>'
+    )
+    # the errors reported instead of the records are not split out as records
+    _, records = split_records(
+        b'<Set><Record uid="1"><error>cannot get document summary</error></Record></Set>', 'xml', database='snp'
+    )
+    assert records == {}
+    _, records = split_records(
+        b'{"result": {"uids": ["1", "2"], "1": {"uid": "1"}, "2": {"uid": "2", "error": "cannot get document summary"}}}',
+        'json', database='pubmed'
+    )
+    assert list(records) == ['1']
+    # records without a known identifier cannot be split
+    assert split_records(b'<Set><Record/></Set>', 'xml', database='snp') is None
+
+
+def test_element_to_dict():
+    record = ElementTree.fromstring(
+        '<ns0:Article xmlns:ns0="urn:x" ns0:lang="en"><Author>A</Author><Author>B</Author><Empty/>'
+        '<Abstract>Growth of H<sub>2</sub>O crystals</Abstract></ns0:Article>'
+    )
+    assert element_to_dict(record) == {
+        'Article': {
+            '@lang': 'en',
+            'Author': ['A', 'B'],
+            'Empty': None,
+            'Abstract': {'sub': '2', '#text': 'Growth of H2O crystals'}
+        }
+    }
+
+
+def test_duplicates_are_sent_once(local_server, create_api):
+    with create_api(normalize_ids=True) as entrez_api:
+        fetched = entrez_api.fetch(['rs1', 1, ' rs2', 'rs1'], max_results=10, database='snp')
+        entrez_api.link(['rs1', 'rs1'], database='gene', database_from='snp')
+        by_batch = entrez_api.in_batches_of(2, sleep_interval=0).summarize(
+            ['rs1', 'rs2', 'rs1', 'rs3', 'rs2'], max_results=10, database='snp'
+        )
+        entrez_api.normalize_ids = False
+        entrez_api.fetch(['1', '1'], max_results=10, database='snp')
+
+    assert [request['params']['id'] for request in local_server.requests] == [
+        ['1,2'], ['1'], ['1,2'], ['3'], ['1,1']
+    ]
+    assert fetched.identifiers.expand({'1': 'a', '2': 'b'}) == ['a', 'a', 'b', 'a']
+    assert list(by_batch) == [('1', '2'), ('3',)]
+    assert by_batch.identifiers.original == ['rs1', 'rs2', 'rs1', 'rs3', 'rs2']
+    assert all(response.identifiers is by_batch.identifiers for response in by_batch.values())
+
+
+def test_identifiers_are_kept_by_default(create_api):
+    with create_api() as entrez_api:
+        by_batch = entrez_api.in_batches_of(2, sleep_interval=0).fetch(['rs1', 'rs1', 'rs2'], max_results=10)
+
+    assert list(by_batch) == [('rs1', 'rs1'), ('rs2',)]
+    assert by_batch.identifiers is None
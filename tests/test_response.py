@@ -0,0 +1,139 @@
+from io import BytesIO
+from unittest.mock import patch
+from xml.etree import ElementTree
+
+import pytest
+from easy_entrez.api import EntrezResponse
+from easy_entrez.queries import FetchQuery
+from easy_entrez.records import iterparse_records
+from easy_entrez.transport import build_response
+
+
+def create_response(content: bytes, content_type='text/xml'):
+    query = FetchQuery(ids=['1'], database='pubmed', max_results=1)
+    return EntrezResponse(query=query, response=build_response(content, content_type=content_type), api=None)
+
+
+def test_data_is_parsed_once():
+    response = create_response(b'<root><a/><b/></root>')
+    with patch('easy_entrez.api.ElementTree.fromstring', wraps=ElementTree.fromstring) as parse:
+        first = response.data
+        second = response.data
+    assert first is second
+    assert parse.call_count == 1
+
+    response = create_response(b'{"a": 1}', content_type='application/json')
+    assert response.data is response.data
+
+
+def test_release():
+    response = create_response(b'<root><a/></root>')
+    assert len(response.data) == 1
+    response.release()
+    assert response.response.content is None
+    with pytest.raises(ValueError, match='The response was released'):
+        response.data
+
+
+RECORDS = b'''<?xml version="1.0" ?>
+<ns0:ExchangeSet xmlns:ns0="https://www.ncbi.nlm.nih.gov/SNP/docsum">
+    <ns0:DocumentSummary uid="1"><ns0:SNP_ID>1</ns0:SNP_ID></ns0:DocumentSummary>
+    <ns0:DocumentSummary uid="2"><ns0:SNP_ID>2</ns0:SNP_ID></ns0:DocumentSummary>
+    <ns0:DocumentSummary uid="3"><ns0:SNP_ID>3</ns0:SNP_ID></ns0:DocumentSummary>
+</ns0:ExchangeSet>
+'''
+
+
+def test_iter_records():
+    response = create_response(RECORDS)
+    records = response.iter_records('DocumentSummary')
+    first = next(records)
+    assert first.get('uid') == '1'
+    assert len(first) == 1
+    assert [record.get('uid') for record in records] == ['2', '3']
+    # processed records are cleared
+    assert len(first) == 0
+
+    namespaced = '{https://www.ncbi.nlm.nih.gov/SNP/docsum}DocumentSummary'
+    assert len(list(create_response(RECORDS).iter_records(namespaced))) == 3
+    assert list(create_response(RECORDS).iter_records('{other}DocumentSummary')) == []
+
+    with pytest.raises(ValueError, match='Can only iterate over records of an XML response'):
+        next(create_response(b'{}', content_type='application/json').iter_records('DocumentSummary'))
+
+
+def test_iter_records_streamed(local_server, create_api):
+    local_server.respond('efetch', RECORDS, content_type='text/xml')
+    with create_api() as entrez_api:
+        response = entrez_api.fetch(['1', '2', '3'], max_results=3, database='snp', stream=True)
+        assert not response.response._content_consumed
+        uids = [record.get('uid') for record in response.iter_records('DocumentSummary')]
+    assert uids == ['1', '2', '3']
+
+
+def test_release_streamed(local_server, create_api):
+    local_server.respond('efetch', RECORDS, content_type='text/xml')
+    with create_api() as entrez_api:
+        response = entrez_api.fetch(['1', '2', '3'], max_results=3, database='snp', stream=True)
+        raw = response.response.raw
+        response.release()
+        assert raw.closed
+        # the unread body does not block the following requests
+        assert entrez_api.fetch(['1'], max_results=1, database='snp').response.status_code == 200
+
+
+def test_spool(local_server, create_api):
+    local_server.respond('efetch', RECORDS, content_type='text/xml')
+    with create_api() as entrez_api:
+        response = entrez_api.fetch(['1', '2', '3'], max_results=3, database='snp', spool=True)
+        uids = [record.get('uid') for record in response.iter_records('DocumentSummary')]
+        assert uids == ['1', '2', '3']
+        # the spooled body can be read repeatedly
+        assert len(response.data) == 3
+        assert response.response.content == RECORDS
+        # the connection was returned to the pool
+        entrez_api.fetch(['1'], max_results=1, database='snp')
+        assert local_server.requests[0]['client_port'] == local_server.requests[1]['client_port']
+    body = response._body
+    response.release()
+    assert body.closed
+
+
+def test_spool_to_disk(local_server, create_api):
+    local_server.respond('efetch', RECORDS, content_type='text/xml')
+    with create_api() as entrez_api:
+        with patch('easy_entrez.transport.SPOOL_MEMORY_LIMIT', 10):
+            response = entrez_api.fetch(['1', '2', '3'], max_results=3, database='snp', spool=True)
+    assert response._body._rolled
+    assert len(response.data) == 3
+
+
+def test_spool_error(local_server, create_api):
+    local_server.respond('efetch', b'Internal Server Error', content_type='text/plain', status=500)
+    with create_api() as entrez_api:
+        response = entrez_api.fetch(['1'], max_results=1, database='snp', spool=True)
+    assert response.response.status_code == 500
+    assert response.response.content == b'Internal Server Error'
+
+
+def test_iter_records_nested():
+    records = ''.join(f'<DocumentSummary uid="{i}"><Name>{i}</Name></DocumentSummary><Other/>' for i in range(900))
+    body = f'<eSummaryResult><DocumentSummarySet>{records}</DocumentSummarySet></eSummaryResult>'.encode()
+    containers = []
+
+    def is_record(element, depth):
+        if element.tag == 'DocumentSummarySet':
+            containers.append(element)
+        return element.tag == 'DocumentSummary'
+
+    uids = []
+    for root, record in iterparse_records(BytesIO(body), is_record):
+        uids.append(record.get('uid'))
+        # neither the processed records nor their siblings are retained
+        # (the elements after the current record may have been parsed ahead)
+        assert containers[0][0] is record
+    assert uids == [str(i) for i in range(900)]
+    assert root.tag == 'eSummaryResult'
+
+    response = create_response(body)
+    assert len(list(response.iter_records('DocumentSummary'))) == 900
@@ -0,0 +1,64 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from requests import ConnectionError
+from easy_entrez.retry import Attempt, RetryPolicy
+from easy_entrez.transport import build_response
+
+
+def test_should_retry():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(Attempt(number=1, elapsed=0, status_code=429))
+    assert policy.should_retry(Attempt(number=2, elapsed=0, status_code=503))
+    assert policy.should_retry(Attempt(number=1, elapsed=0, error=ConnectionError()))
+    assert not policy.should_retry(Attempt(number=3, elapsed=0, status_code=503))
+    assert not policy.should_retry(Attempt(number=1, elapsed=0, status_code=400))
+    assert not policy.should_retry(Attempt(number=1, elapsed=0, status_code=200))
+    assert not RetryPolicy(retry_errors=False).should_retry(Attempt(number=1, elapsed=0, error=ConnectionError()))
+
+
+def test_exponential_backoff_with_jitter():
+    policy = RetryPolicy(backoff=1, multiplier=2, max_backoff=5, jitter=0.25)
+    for number, expected in [(1, 1), (2, 2), (3, 4), (4, 5), (10, 5)]:
+        delay = policy.delay(Attempt(number=number, elapsed=0))
+        assert expected * 0.75 <= delay <= expected * 1.25
+    assert RetryPolicy(backoff=1, jitter=0).delay(Attempt(number=3, elapsed=0)) == 4
+
+
+def test_retry_after():
+    policy = RetryPolicy(backoff=1, jitter=0)
+    attempt = Attempt(number=1, elapsed=0, status_code=429)
+
+    response = build_response(b'', content_type='text/plain', status_code=429)
+    response.headers['Retry-After'] = '7'
+    assert policy.delay(attempt, response) == 7
+    assert RetryPolicy(backoff=1, jitter=0, respect_retry_after=False).delay(attempt, response) == 1
+
+    response.headers['Retry-After'] = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+    assert 25 < policy.delay(attempt, response) <= 30
+
+    response.headers['Retry-After'] = 'not a date'
+    assert policy.delay(attempt, response) == 1
+
+
+def test_single_call_retries(local_server, create_api):
+    local_server.respond('esearch', b'', status=429, headers={'Retry-After': '0'})
+    local_server.respond('esearch', b'', status=503)
+    local_server.respond('esearch', b'{"esearchresult": {"count": "0"}}')
+    entrez_api = create_api(retry_policy=RetryPolicy(backoff=0.01))
+    with pytest.warns(UserWarning, match='retrying'):
+        result = entrez_api.search('cancer', max_results=1)
+    assert result.data['esearchresult']['count'] == '0'
+    assert [attempt.status_code for attempt in result.attempts] == [429, 503, 200]
+    assert result.attempts[0].delay == 0
+    assert result.attempts[-1].delay == 0
+    assert all(attempt.elapsed > 0 for attempt in result.attempts)
+
+
+def test_no_retries_by_default(local_server, create_api):
+    local_server.respond('esearch', b'', status=503)
+    entrez_api = create_api()
+    result = entrez_api.search('cancer', max_results=1)
+    assert result.response.status_code == 503
+    assert len(result.attempts) == 1
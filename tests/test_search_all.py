@@ -0,0 +1,68 @@
+import json
+from threading import Lock
+from time import sleep
+from unittest.mock import patch
+
+import pytest
+from requests import HTTPError
+
+from easy_entrez import EntrezAPI
+from easy_entrez.api import EntrezResponse
+from easy_entrez.transport import build_response
+
+
+def esearch_page(count, ids):
+    return json.dumps({'esearchresult': {'count': str(count), 'idlist': [str(i) for i in ids]}}).encode()
+
+
+def test_pages_through_all_results(local_server, create_api):
+    local_server.respond('esearch', esearch_page(7, [1, 2, 3]))
+    local_server.respond('esearch', esearch_page(7, [4, 5, 6]))
+    local_server.respond('esearch', esearch_page(7, [7]))
+    with create_api() as entrez_api:
+        pages = list(entrez_api.search_all('cancer', page_size=3))
+
+    assert pages == [['1', '2', '3'], ['4', '5', '6'], ['7']]
+    assert [
+        (request['params'].get('retstart'), request['params']['retmax'])
+        for request in local_server.requests
+    ] == [(None, ['3']), (['3'], ['3']), (['6'], ['1'])]
+
+
+def test_max_results(local_server, create_api):
+    local_server.respond('esearch', esearch_page(100, [1, 2]))
+    local_server.respond('esearch', esearch_page(100, [3]))
+    with create_api() as entrez_api:
+        pages = list(entrez_api.search_all('cancer', page_size=2, max_results=3))
+    assert pages == [['1', '2'], ['3']]
+    assert len(local_server.requests) == 2
+
+
+def test_concurrent_pages_keep_order():
+    entrez_api = EntrezAPI('test', 'e@mail.com', minimal_interval=0)
+    lock = Lock()
+    in_flight = []
+    max_in_flight = []
+
+    def search_page(self, query):
+        with lock:
+            in_flight.append(query.start)
+            max_in_flight.append(len(in_flight))
+        sleep(0.01)
+        with lock:
+            in_flight.remove(query.start)
+        response = build_response(esearch_page(10, [query.start, query.start + 1]), content_type='application/json')
+        return EntrezResponse(query=query, response=response, api=self)
+
+    with patch.object(EntrezAPI, '_request', search_page):
+        pages = list(entrez_api.search_all('cancer', page_size=2, workers=3))
+
+    assert pages == [['0', '1'], ['2', '3'], ['4', '5'], ['6', '7'], ['8', '9']]
+    assert max(max_in_flight) > 1
+
+
+def test_failed_page(local_server, create_api):
+    local_server.respond('esearch', b'', status=500)
+    with create_api() as entrez_api:
+        with pytest.raises(HTTPError, match='status code != 200'):
+            list(entrez_api.search_all('cancer'))
@@ -0,0 +1,36 @@
+from pytest import raises
+from easy_entrez.transport import Transport
+
+
+def test_connections_are_reused(local_server, create_api):
+    with create_api() as entrez_api:
+        for _ in range(3):
+            result = entrez_api.search('cancer', max_results=2)
+            assert result.data['esearchresult']['idlist'] == ['1', '2']
+        entrez_api.summarize(['1', '2'], max_results=2)
+
+    assert [request['method'] for request in local_server.requests] == ['GET', 'GET', 'GET', 'POST']
+    assert len({request['client_port'] for request in local_server.requests}) == 1
+
+
+def test_batch_mode_shares_transport(create_api):
+    entrez_api = create_api()
+    assert entrez_api.in_batches_of(1, sleep_interval=0).transport is entrez_api.transport
+    entrez_api.close()
+
+
+def test_compression_negotiation(local_server, create_api):
+    with create_api() as entrez_api:
+        entrez_api.search('cancer', max_results=2)
+    assert 'gzip' in local_server.requests[-1]['headers']['Accept-Encoding']
+
+    with create_api(transport=Transport(compression=False)) as entrez_api:
+        result = entrez_api.search('cancer', max_results=2)
+        assert result.data['esearchresult']['count'] == '2'
+    assert local_server.requests[-1]['headers']['Accept-Encoding'] == 'identity'
+
+
+def test_incorrect_method():
+    with Transport() as transport:
+        with raises(ValueError, match='Incorrect query method: put'):
+            transport.request('put', 'http://127.0.0.1/', data={}, timeout=1)